@@ -0,0 +1,298 @@
+"""This code is to use the BunnyCDN Storage API from asyncio"""
+
+import asyncio
+import os
+from urllib import parse
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from .Storage import Storage
+from .Streams import DOWNLOAD_BUFFER_SIZE, UPLOAD_CHUNK_SIZE
+
+
+async def _file_chunks(file, chunk_size):
+    """
+    Yields chunks of an open file, reading each one in the default executor
+    so the event loop is never blocked on disk
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        chunk = await loop.run_in_executor(None, file.read, chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+class AsyncStorage:
+
+    # initializer for storage account
+
+    def __init__(
+        self,
+        api_key,
+        storage_zone,
+        storage_zone_region="de",
+        max_concurrency=16,
+        pool_maxsize=16,
+    ):
+        """
+        Creates an object for using BunnyCDN Storage API with asyncio.
+        Requires aiohttp (pip install bunnycdnpython[async])
+        Parameters
+        ----------
+        api_key                                 : String
+                                                  Your bunnycdn storage
+                                                  Apikey/FTP password of
+                                                  storage zone
+
+        storage_zone                            : String
+                                                  Name of your storage zone
+
+        storage_zone_region(optional parameter) : String
+                                                  The storage zone region code
+                                                  as per BunnyCDN
+
+        max_concurrency(optional parameter)     : int
+                                                  The number of requests allowed
+                                                  in flight at the same time
+
+        pool_maxsize(optional parameter)        : int
+                                                  Keep-alive connections kept
+                                                  in the connection pool
+        """
+        if aiohttp is None:
+            raise ImportError(
+                "AsyncStorage requires aiohttp, install it with "
+                "pip install bunnycdnpython[async]"
+            )
+        self.headers = {
+            # headers to be passed in HTTP requests
+            "AccessKey": api_key,
+            "Content-Type": "application/json",
+            "Accept": "applcation/json",
+        }
+
+        # applying constraint that storage_zone must be specified
+        assert storage_zone != "", "storage_zone is not specified/missing"
+
+        # For generating base_url for sending requests
+        self.base_url = Storage._Getbaseurl(storage_zone, storage_zone_region)
+
+        # the session and semaphore are created on first use so they
+        # belong to the running event loop
+        self.max_concurrency = max_concurrency
+        self.pool_maxsize = pool_maxsize
+        self._session = None
+        self._semaphore = None
+
+    # url building and listing parsing are shared with Storage
+    _Geturl = Storage._Geturl
+    _populate_metadata = Storage._populate_metadata
+    _parse_listing = Storage._parse_listing
+
+    def _request(self, method, url, **kwargs):
+        """
+        Helper function which sends a request over the pooled aiohttp session
+        """
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_maxsize)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session.request(method, url, **kwargs)
+
+    @property
+    def _slots(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def close(self):
+        """
+        Closes the pooled connections
+        """
+        if self._session is not None:
+            await self._session.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def DownloadFile(
+        self, storage_path, download_path=os.getcwd(), buffer_size=DOWNLOAD_BUFFER_SIZE
+    ):
+        """
+        This coroutine downloads the file of the storage zone mentioned in storage_path
+        to the download_path location mentioned, streaming the response body
+        Parameters
+        ----------
+        storage_path  : String
+                        The path of the file
+                        (including file name and excluding storage zone name)
+                        which is to be downloaded
+        download_path : String
+                        The directory on local server to which downloaded file must be saved
+        buffer_size   : int
+        (optional)      The size in bytes of the chunks read from the response
+        """
+        assert (
+            storage_path != ""
+        ), "storage_path must be specified"  # to make sure storage_path is not null
+        url = self._Geturl(storage_path)
+        file_name = url.split("/")[-1]  # For storing file name
+        download_path = os.path.join(download_path, file_name)
+        loop = asyncio.get_running_loop()
+
+        async with self._slots:
+            try:
+                async with self._request("GET", url, headers=self.headers) as response:
+                    response.raise_for_status()
+                    size = 0
+                    with open(download_path, "wb") as file:
+                        async for chunk in response.content.iter_chunked(buffer_size):
+                            await loop.run_in_executor(None, file.write, chunk)
+                            size += len(chunk)
+            except aiohttp.ClientResponseError as http:
+                return {
+                    "status": "error",
+                    "HTTP": http.status,
+                    "msg": f"Http error occured {http}",
+                }
+            except Exception as err:
+                return {
+                    "status": "error",
+                    "HTTP": None,
+                    "msg": f"error occured {err}",
+                }
+            else:
+                return {
+                    "status": "success",
+                    "HTTP": response.status,
+                    "msg": "File downloaded Successfully",
+                    "bytes": size,
+                }
+
+    async def PutFile(
+        self,
+        file_name,
+        storage_path=None,
+        local_upload_file_path=os.getcwd(),
+        chunk_size=UPLOAD_CHUNK_SIZE,
+    ):
+        """
+        This coroutine uploads files to your BunnyCDN storage zone, streaming
+        the file in chunks of chunk_size bytes
+        Parameters
+        ----------
+        storage_path                : String
+                                      The path of directory in storage zone
+                                      (including the name of file as desired and excluding storage zone name)
+                                      to which file is to be uploaded
+        file_name                   : String
+                                      The name of the file as stored in local server
+        local_upload_file_path      : String
+                                      The path of file as stored in local server(excluding file name)
+                                      from where file is to be uploaded
+        chunk_size(optional)        : int
+                                      The size in bytes of each chunk sent
+        """
+        local_upload_file_path = os.path.join(local_upload_file_path, file_name)
+
+        # to build correct url
+        if storage_path is not None and storage_path != "":
+            url = self._Geturl(storage_path)
+        else:
+            url = self._Geturl(file_name)
+
+        async with self._slots:
+            try:
+                with open(local_upload_file_path, "rb") as file:
+                    size = os.fstat(file.fileno()).st_size
+                    headers = dict(self.headers, **{"Content-Length": str(size)})
+                    body = _file_chunks(file, chunk_size) if size else b""
+                    async with self._request(
+                        "PUT", url, data=body, headers=headers
+                    ) as response:
+                        response.raise_for_status()
+            except aiohttp.ClientResponseError as http:
+                return {
+                    "status": "error",
+                    "HTTP": http.status,
+                    "msg": f"Upload Failed HTTP Error Occured: {http}",
+                }
+            else:
+                return {
+                    "status": "success",
+                    "HTTP": response.status,
+                    "msg": "The File Upload was Successful",
+                }
+
+    async def DeleteFile(self, storage_path=""):
+        """
+        This coroutine deletes a file or folder mentioned in the storage_path from the storage zone
+        Parameters
+        ----------
+        storage_path : The directory path to your file (including file name) or folder which is to be deleted.
+        """
+        assert (
+            storage_path != ""
+        ), "storage_path must be specified"  # to make sure storage_path is not null
+        # to build correct url
+        if storage_path[0] == "/":
+            storage_path = storage_path[1:]
+        url = self.base_url + parse.quote(storage_path)
+
+        async with self._slots:
+            try:
+                async with self._request("DELETE", url, headers=self.headers) as response:
+                    response.raise_for_status()
+            except aiohttp.ClientResponseError as http:
+                return {
+                    "status": "error",
+                    "HTTP": http.status,
+                    "msg": f"HTTP Error occured: {http}",
+                }
+            except Exception as err:
+                return {
+                    "status": "error",
+                    "HTTP": None,
+                    "msg": f"Object Delete failed ,Error occured:{err}",
+                }
+            else:
+                return {
+                    "status": "success",
+                    "HTTP": response.status,
+                    "msg": "Object Successfully Deleted",
+                }
+
+    async def GetStoragedObjectsList(self, storage_path=None, include_metadata=False):
+        """
+        This coroutine returns a list of files and directories located in given storage_path.
+        Parameters
+        ----------
+        storage_path : The directory path that you want to list.
+        include_metadata : bool, optional
+                          If True, includes additional metadata fields in the response
+        """
+        # to build correct url
+        if storage_path is not None and storage_path.strip("/") != "":
+            url = self._Geturl(storage_path) + "/"
+        else:
+            url = self.base_url
+
+        async with self._slots:
+            try:
+                async with self._request("GET", url, headers=self.headers) as response:
+                    response.raise_for_status()
+                    objects = await response.json(content_type=None)
+            except aiohttp.ClientResponseError as http:
+                return {
+                    "status": "error",
+                    "HTTP": http.status,
+                    "msg": f"http error occured {http}",
+                }
+            else:
+                return self._parse_listing(objects, include_metadata)
@@ -1,18 +1,61 @@
 # from https://github.com/mathrithms/BunnyCDN-Python-Lib/blob/master/BunnyCDN/CDN.py
+import datetime
+import ipaddress
 import json
-import requests
+import os
+import time
 from requests.exceptions import HTTPError
 from urllib import parse
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
+from .Cache import TTLCache
+from .Concurrency import MAX_WORKERS, RateLimiter, bounded_map
+from .Metrics import trace_operations
+from .Transport import Transport
+
+
+@trace_operations
 class CDN:
     # initializer function
-    def __init__(self, api_key):
+    def __init__(
+        self,
+        api_key,
+        transport=None,
+        pool_connections=10,
+        pool_maxsize=10,
+        response_cache_ttl=0,
+        response_cache_size=256,
+    ):
         """
         Parameters
         ----------
-        api_key     : String
-                      BunnyCDN account api key
+        api_key             : String
+                              BunnyCDN account api key
+
+        transport           : Transport
+        (optional)            A pooled transport to share with other
+                              clients. If None, the object creates
+                              and owns one
+
+        pool_connections    : int
+        (optional)            Number of per-host pools of the transport
+                              created here
+
+        pool_maxsize        : int
+        (optional)            Keep-alive connections kept in each host pool
+
+        response_cache_ttl  : float
+        (optional)            Seconds the storage zone and pull zone reads
+                              are cached for. 0 disables the cache. Any
+                              successful change made through this object
+                              empties it
+
+        response_cache_size : int
+        (optional)            The number of cached responses kept
 
         """
         assert api_key != "", "api_key for the account must be specified"
@@ -23,6 +66,33 @@ class CDN:
         }
         self.base_url = "https://api.bunny.net/"
 
+        # pooled keep-alive connections reused across calls
+        self._owns_transport = transport is None
+        if transport is None:
+            transport = Transport(
+                pool_connections=pool_connections, pool_maxsize=pool_maxsize
+            )
+        self.transport = transport
+
+        # raw bodies of GET endpoints, shared by every method reading them
+        self.response_cache = None
+        self._response_generation = 0
+        if response_cache_ttl:
+            self.response_cache = TTLCache(response_cache_ttl, response_cache_size)
+
+    def close(self):
+        """
+        Closes the pooled connections if the transport is owned by this object
+        """
+        if self._owns_transport:
+            self.transport.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
     def _Geturl(self, Task_name):
         """
         This function is helper for the other methods in code
@@ -40,6 +110,33 @@ class CDN:
             url = self.base_url + parse.quote(Task_name)
         return url
 
+    def _Getjson(self, Task_name):
+        """
+        Sends a GET request for Task_name and returns the decoded JSON body.
+        With the response cache enabled the body is fetched once and decoded
+        again for every caller, so callers can change what they receive
+        """
+        cache = self.response_cache
+        content = cache.get(Task_name) if cache is not None else None
+        if content is None:
+            generation = self._response_generation
+            response = self.transport.get(self._Geturl(Task_name), headers=self.headers)
+            response.raise_for_status()
+            content = response.content
+            # a body fetched while a change was made may already be stale
+            if cache is not None and generation == self._response_generation:
+                cache.set(Task_name, content)
+        return json.loads(content)
+
+    def _invalidate_responses(self):
+        """
+        Empties the response cache after a change. Storage zone and pull zone
+        responses embed each other's data, so no entry is kept
+        """
+        self._response_generation += 1
+        if self.response_cache is not None:
+            self.response_cache.clear()
+
     def AddCertificate(self, PullZoneId, Hostname, Certificate, CertificateKey):
         """
         This function adds custom certificate to the given pullzone
@@ -71,7 +168,7 @@ class CDN:
         )
 
         try:
-            response = requests.post(
+            response = self.transport.post(
                 self._Geturl("pullzone/addCertificate"),
                 data=values,
                 headers=self.headers,
@@ -82,6 +179,7 @@ class CDN:
         except Exception as err:
             return {"status": "error", "HTTP": response.status_code, "msg": err}
         else:
+            self._invalidate_responses()
             return {
                 "status": "success",
                 "HTTP": response.status_code,
@@ -104,7 +202,7 @@ class CDN:
         values = json.dumps({"PullZoneId": PullZoneId, "BlockedIp": BlockedIp})
 
         try:
-            response = requests.post(
+            response = self.transport.post(
                 self._Geturl("pullzone/addBlockedIp"), data=values, headers=self.headers
             )
             response.raise_for_status()
@@ -113,6 +211,7 @@ class CDN:
         except Exception as err:
             return {"status": "error", "HTTP": response.status_code, "msg": err}
         else:
+            self._invalidate_responses()
             return {
                 "status": "success",
                 "HTTP": response.status_code,
@@ -135,7 +234,7 @@ class CDN:
         values = json.dumps({"PullZoneId": PullZoneId, "BlockedIp": BlockedIp})
 
         try:
-            response = requests.post(
+            response = self.transport.post(
                 self._Geturl("pullzone/removeBlockedIp"),
                 data=values,
                 headers=self.headers,
@@ -146,12 +245,131 @@ class CDN:
         except Exception as err:
             return {"status": "error", "HTTP": response.status_code, "msg": err}
         else:
+            self._invalidate_responses()
             return {
                 "status": "success",
                 "HTTP": response.status_code,
                 "msg": "Ip removed from blocked IPs list ",
             }
 
+    def SyncBlockedIps(
+        self,
+        PullZoneID,
+        BlockedIps,
+        remove_unlisted=True,
+        aggregate=True,
+        single_write=None,
+        max_workers=MAX_WORKERS,
+        dry_run=False,
+    ):
+        """
+        This method makes the blocked IPs of the pullzone match BlockedIps.
+        The list is compared with the current BlockedIps of the zone, so only
+        the differences are sent
+
+        Parameters
+        ----------
+        PullZoneID      : int64
+                          The ID of the Pull Zone whose blocked IPs are synced
+
+        BlockedIps      : iterable of string
+                          The IP addresses or CIDR ranges to block
+
+        remove_unlisted : boolean
+        (optional)        If False blocked IPs missing from BlockedIps are kept,
+                          so the IPs are only added
+
+        aggregate       : boolean
+        (optional)        If True addresses are merged into the fewest CIDR
+                          ranges covering exactly the same addresses
+
+        single_write    : boolean
+        (optional)        If True the whole list is written with one update of
+                          the pullzone, if False every IP is added or removed
+                          with its own request, max_workers at a time. By
+                          default one update is used when more than one IP changes
+
+        max_workers     : int
+        (optional)        The number of requests sent concurrently
+
+        dry_run         : boolean
+        (optional)        If True the changes are computed but not sent
+
+        Returns a dictionary with the overall "status", a "msg", the "added" and
+        "removed" entries, and "stats" holding current, desired, added, removed,
+        failed, requests and seconds
+        """
+        start = time.perf_counter()
+        try:
+            networks = [ipaddress.ip_network(ip.strip(), strict=False) for ip in BlockedIps]
+        except ValueError as err:
+            return {"status": "error", "HTTP": None, "msg": err}
+        if aggregate:
+            networks = [
+                network
+                for version in (4, 6)
+                for network in ipaddress.collapse_addresses(
+                    network for network in networks if network.version == version
+                )
+            ]
+        desired = list(dict.fromkeys(_network_text(network) for network in networks))
+
+        pullzone = self.GetPullZone(PullZoneID)
+        if pullzone.get("status") == "error":
+            return pullzone
+        current = list(pullzone.get("BlockedIps") or [])
+        current_keys = {_ip_key(ip) for ip in current}
+        desired_keys = {_ip_key(ip) for ip in desired}
+        added = [ip for ip in desired if _ip_key(ip) not in current_keys]
+        removed = [ip for ip in current if _ip_key(ip) not in desired_keys] if remove_unlisted else []
+        if single_write is None:
+            single_write = len(added) + len(removed) > 1
+
+        outcomes = []
+        if (added or removed) and not dry_run:
+            if single_write:
+                removed_set = set(removed)
+                outcomes.append(
+                    self.ApplyPullZoneConfig(
+                        PullZoneID,
+                        {"BlockedIps": [ip for ip in current if ip not in removed_set] + added},
+                        current=pullzone,
+                    )
+                )
+            else:
+                operations = [("add", ip) for ip in added] + [("remove", ip) for ip in removed]
+
+                def apply(operation):
+                    action, ip = operation
+                    try:
+                        if action == "add":
+                            return self.AddBlockedIp(PullZoneID, ip)
+                        return self.RemoveBlockedIp(PullZoneID, ip)
+                    except Exception as err:
+                        return {"status": "error", "HTTP": None, "msg": err}
+
+                outcomes = [outcome for _, outcome in bounded_map(apply, operations, max_workers)]
+        errors = [outcome["msg"] for outcome in outcomes if outcome["status"] == "error"]
+        msg = f"Added {len(added)} and removed {len(removed)} blocked IPs"
+        if dry_run:
+            msg += " (dry run)"
+        seconds = time.perf_counter() - start
+        return {
+            "status": "error" if errors else "success",
+            "msg": errors[0] if errors else msg,
+            "added": added,
+            "removed": removed,
+            "stats": {
+                "current": len(current),
+                "desired": len(desired),
+                "added": len(added),
+                "removed": len(removed),
+                "failed": len(errors),
+                "requests": 1 + len(outcomes),
+                "seconds": seconds,
+            },
+        }
+
     def StorageZoneData(self):
         """
         This function returns a list of details of each storage zones
@@ -159,15 +377,14 @@ class CDN:
 
         """
         try:
-            response = requests.get(self._Geturl("storagezone"), headers=self.headers)
-            response.raise_for_status()
+            storagezones = self._Getjson("storagezone")
         except HTTPError as http:
-            return {"status": "error", "HTTP": response.status_code, "msg": http}
+            return {"status": "error", "HTTP": http.response.status_code, "msg": http}
         except Exception as err:
-            return {"status": "error", "HTTP": response.status_code, "msg": err}
+            return {"status": "error", "HTTP": None, "msg": err}
         else:
             storage_summary = []
-            for storagezone in response.json():
+            for storagezone in storagezones:
                 storage_zone_details = {}
                 storage_zone_details["Id"] = storagezone["Id"]
                 storage_zone_details["Storage_Zone_Name"] = storagezone["Name"]
@@ -189,15 +406,14 @@ class CDN:
         name and storage zone id
         """
         try:
-            response = requests.get(self._Geturl("storagezone"), headers=self.headers)
-            response.raise_for_status()
+            storagezones = self._Getjson("storagezone")
         except HTTPError as http:
-            return {"status": "error", "HTTP": response.status_code, "msg": http}
+            return {"status": "error", "HTTP": http.response.status_code, "msg": http}
         except Exception as err:
-            return {"status": "error", "HTTP": response.status_code, "msg": err}
+            return {"status": "error", "HTTP": None, "msg": err}
         else:
             storage_list = []
-            for storagezone in response.json():
+            for storagezone in storagezones:
                 storage_list.append({storagezone["Name"]: storagezone["Id"]})
             return storage_list
 
@@ -238,7 +454,7 @@ class CDN:
             }
         )
         try:
-            response = requests.post(
+            response = self.transport.post(
                 self._Geturl("storagezone"), data=values, headers=self.headers
             )
             response.raise_for_status()
@@ -247,6 +463,7 @@ class CDN:
         except Exception as err:
             return {"status": "error", "HTTP": response.status_code, "msg": err}
         else:
+            self._invalidate_responses()
             return {
                 "status": "success",
                 "HTTP": response.status_code,
@@ -265,16 +482,13 @@ class CDN:
 
         """
         try:
-            response = requests.get(
-                self._Geturl(f"storagezone/{storage_zone_id}"), headers=self.headers
-            )
-            response.raise_for_status()
+            storagezone = self._Getjson(f"storagezone/{storage_zone_id}")
         except HTTPError as http:
-            return {"status": "error", "HTTP": response.status_code, "msg": http}
+            return {"status": "error", "HTTP": http.response.status_code, "msg": http}
         except Exception as err:
-            return {"status": "error", "HTTP": response.status_code, "msg": err}
+            return {"status": "error", "HTTP": None, "msg": err}
         else:
-            return response.json()
+            return storagezone
 
     def DeleteStorageZone(self, storage_zone_id):
         """
@@ -286,7 +500,7 @@ class CDN:
                             The ID of the storage zone that should be deleted
         """
         try:
-            response = requests.delete(
+            response = self.transport.delete(
                 self._Geturl(f"storagezone/{storage_zone_id}"), headers=self.headers
             )
             response.raise_for_status()
@@ -295,6 +509,7 @@ class CDN:
         except Exception as err:
             return {"status": "error", "HTTP": response.status_code, "msg": err}
         else:
+            self._invalidate_responses()
             return {
                 "status": "Success",
                 "HTTP": response.status_code,
@@ -312,7 +527,7 @@ class CDN:
               Use a CDN enabled URL such as http://myzone.b-cdn.net/style.css
         """
         try:
-            response = requests.post(
+            response = self.transport.post(
                 self._Geturl("purge"), params={"url": url}, headers=self.headers
             )
             response.raise_for_status()
@@ -327,13 +542,94 @@ class CDN:
                 "msg": f"Purged Cache for url:{url}",
             }
 
+    def PurgeUrls(
+        self,
+        urls,
+        max_workers=MAX_WORKERS,
+        rate_limit=None,
+        collapse_threshold=None,
+    ):
+        """
+        This method purges many URLs concurrently. Duplicate URLs are purged once
+        and, if collapse_threshold is given, URLs sharing a folder are purged with
+        a single wildcard purge of that folder
+
+        Parameters
+        ----------
+        urls                : iterable of string
+                              The URLs of the files that will be purged
+
+        max_workers         : int
+        (optional)            The number of purges sent concurrently
+
+        rate_limit          : float
+        (optional)            The most purge requests sent per second
+
+        collapse_threshold  : int
+        (optional)            When at least this many URLs are in the same folder
+                              of the same host, they are replaced by one purge
+                              of "<folder>/*". This purges every file of the folder
+
+        Returns a dictionary with the overall "status", a "msg", the "results" of
+        every distinct URL with the "purge_url" that covered it, and "stats"
+        holding urls, requests, purged, failed and seconds
+        """
+        start = time.perf_counter()
+        # dict keeps the first-seen order while dropping duplicates
+        unique_urls = list(dict.fromkeys(urls))
+        purge_urls = {url: url for url in unique_urls}
+        if collapse_threshold:
+            folders = {}
+            for url in unique_urls:
+                parts = parse.urlsplit(url)
+                # URLs with a query string or without a file path are purged as they are
+                if parts.query or not parts.netloc or parts.path in ("", "/"):
+                    continue
+                folder = f"{parts.scheme}://{parts.netloc}{parts.path.rsplit('/', 1)[0]}"
+                folders.setdefault(folder, []).append(url)
+            for folder, members in folders.items():
+                if len(members) >= collapse_threshold:
+                    for url in members:
+                        purge_urls[url] = folder + "/*"
+        limiter = RateLimiter(rate_limit) if rate_limit else None
+
+        def purge(purge_url):
+            if limiter is not None:
+                limiter.acquire()
+            try:
+                return self.PurgeUrlCache(purge_url)
+            except Exception as err:
+                return {"status": "error", "HTTP": None, "msg": err}
+
+        outcomes = dict(
+            bounded_map(purge, dict.fromkeys(purge_urls.values()), max_workers)
+        )
+        results = [
+            dict(outcomes[purge_urls[url]], url=url, purge_url=purge_urls[url])
+            for url in unique_urls
+        ]
+        failed = sum(1 for result in outcomes.values() if result["status"] == "error")
+        seconds = time.perf_counter() - start
+        return {
+            "status": "error" if failed else "success",
+            "msg": f"Purged {len(unique_urls)} URLs with {len(outcomes)} requests",
+            "results": results,
+            "stats": {
+                "urls": len(unique_urls),
+                "requests": len(outcomes),
+                "purged": len(outcomes) - failed,
+                "failed": failed,
+                "seconds": seconds,
+            },
+        }
+
     def Billing(self):
         """
         This method returns the current billing summary of the account
 
         """
         try:
-            response = requests.get(self._Geturl("billing"), headers=self.headers)
+            response = self.transport.get(self._Geturl("billing"), headers=self.headers)
             response.raise_for_status()
         except HTTPError as http:
             return {"status": "error", "HTTP": response.status_code, "msg": http}
@@ -352,7 +648,7 @@ class CDN:
 
         """
         try:
-            response = requests.get(
+            response = self.transport.get(
                 self._Geturl("billing/applycode"),
                 params={"couponCode": couponCode},
                 headers=self.headers,
@@ -413,7 +709,7 @@ class CDN:
         }
 
         try:
-            response = requests.get(
+            response = self.transport.get(
                 self._Geturl("statistics"), params=params, headers=self.headers
             )
             response.raise_for_status()
@@ -424,6 +720,145 @@ class CDN:
         else:
             return response.json()
 
+    def StatsSeries(
+        self,
+        dateFrom,
+        dateTo,
+        pullZone=None,
+        serverZoneId=None,
+        loadErrors=True,
+        chunk_days=7,
+        max_workers=MAX_WORKERS,
+        cache_dir=None,
+        as_numpy=False,
+    ):
+        """
+        This method returns the chart statistics of a date range as columns.
+        The range is split into chunks of chunk_days which are fetched
+        concurrently, and completed past days can be cached on disk so a
+        rerun only fetches the days that are missing or still changing
+
+        Parameters
+        ----------
+
+        dateFrom        : string
+                          The first day of the range. Format: yyyy-mm-dd
+
+        dateTo          : string
+                          The last day of the range. Format: yyyy-mm-dd
+
+        pullZone        : int64
+        (optional)        The ID of the Pull Zone for which the
+                          statistics should be returned
+
+        serverZoneId    : int64
+        (optional)        The server zone for which the data
+                          should be returned.
+
+        loadErrors      : boolean
+        (optional)        Set to true by default
+
+        chunk_days      : int
+        (optional)        The number of days fetched by each request
+
+        max_workers     : int
+        (optional)        The number of requests sent concurrently
+
+        cache_dir       : string
+        (optional)        A directory where the statistics of every day before
+                          today (UTC) are kept as JSON files and read back
+
+        as_numpy        : boolean
+        (optional)        If True the columns are NumPy arrays
+                          (timestamps as datetime64), otherwise lists.
+                          Requires numpy (pip install bunnycdnpython[numpy])
+
+        Returns a dictionary with "timestamps", the sorted time of every data
+        point, and "metrics", mapping every chart of the statistics (for example
+        BandwidthUsedChart) to its values aligned with timestamps. Missing points
+        are NaN
+        """
+        if as_numpy and numpy is None:
+            raise ImportError(
+                "StatsSeries(as_numpy=True) requires numpy, install it with "
+                "pip install bunnycdnpython[numpy]"
+            )
+        first = datetime.date.fromisoformat(dateFrom)
+        last = datetime.date.fromisoformat(dateTo)
+        today = datetime.datetime.now(datetime.timezone.utc).date()
+        days = [first + datetime.timedelta(n) for n in range((last - first).days + 1)]
+
+        def cache_path(day):
+            name = f"stats-{pullZone or 'all'}-{serverZoneId or 'all'}-{int(bool(loadErrors))}-{day}.json"
+            return os.path.join(cache_dir, name)
+
+        # charts of every day, {day: {chart: {timestamp: value}}}
+        charts = {}
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+            for day in days:
+                if day < today and os.path.exists(cache_path(day)):
+                    with open(cache_path(day)) as file:
+                        charts[day] = json.load(file)
+
+        # consecutive missing days are fetched together, chunk_days at a time
+        chunks = []
+        for day in days:
+            if day in charts:
+                continue
+            if chunks and chunks[-1][-1] == day - datetime.timedelta(1) and len(chunks[-1]) < chunk_days:
+                chunks[-1].append(day)
+            else:
+                chunks.append([day])
+
+        def fetch(chunk):
+            try:
+                return self.Stats(
+                    str(chunk[0]), str(chunk[-1]), pullZone, serverZoneId, loadErrors
+                )
+            except Exception as err:
+                return {"status": "error", "HTTP": None, "msg": err}
+
+        for chunk, response in bounded_map(fetch, (tuple(c) for c in chunks), max_workers):
+            if "status" in response:
+                return response
+            fetched = {day: {} for day in chunk}
+            for chart, points in response.items():
+                if not chart.endswith("Chart") or not isinstance(points, dict):
+                    continue
+                for timestamp, value in points.items():
+                    day = datetime.date.fromisoformat(timestamp[:10])
+                    if day in fetched:
+                        fetched[day].setdefault(chart, {})[timestamp] = value
+            for day, day_charts in fetched.items():
+                charts[day] = day_charts
+                if cache_dir is not None and day < today:
+                    with open(cache_path(day), "w") as file:
+                        json.dump(day_charts, file)
+
+        timestamps = sorted(
+            {timestamp for day in charts.values() for points in day.values() for timestamp in points}
+        )
+        names = sorted({chart for day in charts.values() for chart in day})
+        merged = {name: {} for name in names}
+        for day_charts in charts.values():
+            for chart, points in day_charts.items():
+                merged[chart].update(points)
+        metrics = {
+            name: [merged[name].get(timestamp, float("nan")) for timestamp in timestamps]
+            for name in names
+        }
+        if as_numpy:
+            return {
+                "timestamps": numpy.array(
+                    [timestamp.rstrip("Z") for timestamp in timestamps], dtype="datetime64[s]"
+                ),
+                "metrics": {
+                    name: numpy.array(values, dtype=float) for name, values in metrics.items()
+                },
+            }
+        return {"timestamps": timestamps, "metrics": metrics}
+
     def GetPullZoneList(self):
         """
         This function fetches the list of pullzones in the User's Account
@@ -433,15 +868,14 @@ class CDN:
         None
         """
         try:
-            response = requests.get(self._Geturl("pullzone"), headers=self.headers)
-            response.raise_for_status()
+            pullzones = self._Getjson("pullzone")
         except HTTPError as http:
-            return {"status": "error", "HTTP": response.status_code, "msg": http}
+            return {"status": "error", "HTTP": http.response.status_code, "msg": http}
         except Exception as err:
-            return {"status": "error", "HTTP": response.status_code, "msg": err}
+            return {"status": "error", "HTTP": None, "msg": err}
         else:
             pullzone_list = []
-            for pullzone in response.json():
+            for pullzone in pullzones:
                 pullzone_list.append({pullzone["Name"]: pullzone["Id"]})
             return pullzone_list
 
@@ -478,7 +912,7 @@ class CDN:
                 "StorageZoneId": StorageZoneId,
             }
         try:
-            response = requests.post(
+            response = self.transport.post(
                 self._Geturl("pullzone"), data=values, headers=self.headers
             )
             response.raise_for_status()
@@ -487,6 +921,7 @@ class CDN:
         except Exception as err:
             return {"status": "error", "HTTP": response.status_code, "msg": err}
         else:
+            self._invalidate_responses()
             return response.json()
 
     def GetPullZone(self, PullZoneID):
@@ -500,16 +935,13 @@ class CDN:
                                 The ID (number) of the pullzone to return
         """
         try:
-            response = requests.get(
-                self._Geturl(f"pullzone/{PullZoneID}"), headers=self.headers
-            )
-            response.raise_for_status()
+            pullzone = self._Getjson(f"pullzone/{PullZoneID}")
         except HTTPError as http:
-            return {"status": "error", "HTTP": response.status_code, "msg": http}
+            return {"status": "error", "HTTP": http.response.status_code, "msg": http}
         except Exception as err:
-            return {"status": "error", "HTTP": response.status_code, "msg": err}
+            return {"status": "error", "HTTP": None, "msg": err}
         else:
-            return response.json()
+            return pullzone
 
     def UpdatePullZone(
         self,
@@ -785,7 +1217,7 @@ class CDN:
             }
         )
         try:
-            response = requests.post(
+            response = self.transport.post(
                 self._Geturl(f"pullzone/{PullZoneID}"),
                 data=values,
                 headers=self.headers,
@@ -796,12 +1228,135 @@ class CDN:
         except Exception as err:
             return {"status": "error", "HTTP": response.status_code, "msg": err}
         else:
+            self._invalidate_responses()
             return {
                 "status": "success",
                 "HTTP": response.status_code,
                 "msg": "Update successful",
             }
 
+    def ApplyPullZoneConfig(self, PullZoneID, desired, current=None, dry_run=False):
+        """
+        This method brings the pullzone to the desired configuration.
+        It compares desired with the current settings of the zone and sends
+        only the fields that differ, or nothing if the zone is up to date
+
+        Parameters
+        ----------
+        PullZoneID          : int64
+                              The ID (number) of the pullzone to update
+
+        desired             : dict
+                              The settings to apply, keyed by the field names
+                              returned by GetPullZone (for example
+                              {"CacheControlMaxAgeOverride": 3600})
+
+        current             : dict
+        (optional)            The current settings of the zone. If None they
+                              are fetched with GetPullZone
+
+        dry_run             : boolean
+        (optional)            If True the changes are computed but not sent
+
+        Returns a dictionary with "status", "HTTP", "msg" and the "changes",
+        mapping every changed field to its "old" and "new" value
+        """
+        if current is None:
+            current = self.GetPullZone(PullZoneID)
+            if current.get("status") == "error":
+                return dict(current, changes={})
+        changes = _diff_config(current, desired)
+        if not changes:
+            return {"status": "success", "HTTP": None, "msg": "No changes", "changes": changes}
+        if dry_run:
+            return {"status": "success", "HTTP": None, "msg": "Dry run", "changes": changes}
+        values = json.dumps({field: change["new"] for field, change in changes.items()})
+        try:
+            response = self.transport.post(
+                self._Geturl(f"pullzone/{PullZoneID}"),
+                data=values,
+                headers=self.headers,
+            )
+            response.raise_for_status()
+        except HTTPError as http:
+            return {"status": "error", "HTTP": response.status_code, "msg": http, "changes": changes}
+        except Exception as err:
+            return {"status": "error", "HTTP": None, "msg": err, "changes": changes}
+        else:
+            self._invalidate_responses()
+            return {
+                "status": "success",
+                "HTTP": response.status_code,
+                "msg": "Update successful",
+                "changes": changes,
+            }
+
+    def ApplyPullZoneConfigs(self, configs, max_workers=MAX_WORKERS, dry_run=False):
+        """
+        This method applies ApplyPullZoneConfig to many pullzones concurrently.
+        The current settings of every zone are read with a single request for
+        the pullzone list, and only the zones which differ are written
+
+        Parameters
+        ----------
+        configs             : dict
+                              The desired settings of every zone, keyed by
+                              the pullzone ID
+
+        max_workers         : int
+        (optional)            The number of updates sent concurrently
+
+        dry_run             : boolean
+        (optional)            If True the changes are computed but not sent
+
+        Returns a dictionary with the overall "status", a "msg", the "results" of
+        every zone with its "zone_id", and "stats" holding zones, changed,
+        unchanged, failed, fields, requests, requests_saved and seconds.
+        requests_saved compares with sending UpdatePullZone to every zone, and is
+        0 when the zones missing from the pullzone list cost more requests than that
+        """
+        start = time.perf_counter()
+        calls = 1
+        try:
+            current = {pullzone["Id"]: pullzone for pullzone in self._Getjson("pullzone")}
+        except Exception:
+            # each zone is then read on its own
+            current = {}
+
+        def apply(zone_id):
+            try:
+                return self.ApplyPullZoneConfig(
+                    zone_id, configs[zone_id], current.get(zone_id), dry_run
+                )
+            except Exception as err:
+                return {"status": "error", "HTTP": None, "msg": err, "changes": {}}
+
+        outcomes = dict(bounded_map(apply, configs, max_workers))
+        results = [dict(outcomes[zone_id], zone_id=zone_id) for zone_id in configs]
+        failed = sum(1 for result in results if result["status"] == "error")
+        changed = sum(1 for result in results if result["changes"] and result["status"] == "success")
+        calls += sum(1 for zone_id in configs if zone_id not in current)
+        if not dry_run:
+            calls += sum(1 for result in results if result["changes"])
+        seconds = time.perf_counter() - start
+        return {
+            "status": "error" if failed else "success",
+            "msg": f"Changed {changed} of {len(configs)} pullzones with {calls} requests",
+            "results": results,
+            "stats": {
+                "zones": len(configs),
+                "changed": changed,
+                "unchanged": sum(
+                    1 for result in results if not result["changes"] and result["status"] == "success"
+                ),
+                "failed": failed,
+                "fields": sum(len(result["changes"]) for result in results),
+                "requests": calls,
+                "requests_saved": max(0, len(configs) - calls),
+                "seconds": seconds,
+            },
+        }
+
     def DeletePullZone(self, PullZoneID):
         """
         This function deletes the pullzone with the given ID
@@ -813,7 +1368,7 @@ class CDN:
 
         """
         try:
-            response = requests.delete(
+            response = self.transport.delete(
                 self._Geturl(f"pullzone/{PullZoneID}"), headers=self.headers
             )
             response.raise_for_status()
@@ -822,6 +1377,7 @@ class CDN:
         except Exception as err:
             return {"status": "error", "HTTP": response.status_code, "msg": err}
         else:
+            self._invalidate_responses()
             return {
                 "status": "success",
                 "HTTP": response.status_code,
@@ -839,7 +1395,7 @@ class CDN:
                                 who's cache is to be Purged
         """
         try:
-            response = requests.post(
+            response = self.transport.post(
                 self._Geturl(f"pullzone/{PullZoneID}/purgeCache"), headers=self.headers
             )
             response.raise_for_status()
@@ -927,7 +1483,7 @@ class CDN:
         if ExtraActions:
             request_payload["ExtraActions"] = ExtraActions
         try:
-            response = requests.post(
+            response = self.transport.post(
                 self._Geturl(f"pullzone/{PullZoneID}/edgerules/addOrUpdate"),
                 data=json.dumps(request_payload),
                 headers=self.headers,
@@ -938,6 +1494,7 @@ class CDN:
         except Exception as err:
             return {"status": "error", "HTTP": response.status_code, "msg": err}
         else:
+            self._invalidate_responses()
             return {
                 "status": "success",
                 "HTTP": response.status_code,
@@ -958,7 +1515,7 @@ class CDN:
 
         """
         try:
-            response = requests.delete(
+            response = self.transport.delete(
                 self._Geturl(f"pullzone/{PullZoneID}/edgerules/{EdgeRuleID}"),
                 headers=self.headers,
             )
@@ -968,12 +1525,130 @@ class CDN:
         except Exception as err:
             return {"status": "error", "HTTP": response.status_code, "msg": err}
         else:
+            self._invalidate_responses()
             return {
                 "status": "success",
                 "HTTP": response.status_code,
                 "msg": "Successfully Deleted edgerule",
             }
 
+    def SyncEdgeRules(
+        self, PullZoneID, desired_rules, delete_unmatched=True, max_workers=MAX_WORKERS, dry_run=False
+    ):
+        """
+        This method makes the edgerules of the pullzone match desired_rules
+        with the fewest requests. Rules are matched by GUID when one is given,
+        otherwise by Description; matched rules are updated only if a field
+        differs, the others are added, and rules left unmatched are deleted
+
+        Parameters
+        ----------
+        PullZoneID          : int64
+                              The ID (number) of the pullzone whose edgerules
+                              are synced
+
+        desired_rules       : list of dict
+                              The edgerules in the format of the EdgeRules of
+                              GetPullZone (ActionType, ActionParameter1,
+                              ActionParameter2, Triggers, TriggerMatchingType,
+                              ExtraActions, Description, Enabled and optionally
+                              Guid). Fields left out are not compared
+
+        delete_unmatched    : boolean
+        (optional)            If False rules which are not desired are kept
+
+        max_workers         : int
+        (optional)            The number of requests sent concurrently
+
+        dry_run             : boolean
+        (optional)            If True the operations are computed but not sent
+
+        Returns a dictionary with the overall "status", a "msg", the "results" of
+        every operation with its "action", "guid" and "description", and "stats"
+        holding added, updated, deleted, unchanged, failed, requests and seconds
+        """
+        start = time.perf_counter()
+        pullzone = self.GetPullZone(PullZoneID)
+        if pullzone.get("status") == "error":
+            return dict(pullzone, results=[], stats={})
+        unmatched = list(pullzone.get("EdgeRules") or [])
+
+        operations = []
+        unchanged = 0
+        for rule in desired_rules:
+            guid = rule.get("Guid", rule.get("GUID"))
+            if guid:
+                found = [current for current in unmatched if current.get("Guid") == guid]
+            else:
+                found = [
+                    current for current in unmatched
+                    if current.get("Description") == rule.get("Description")
+                ]
+            if not found:
+                operations.append(("add", rule))
+                continue
+            current = found[0]
+            unmatched.remove(current)
+            fields = {key: value for key, value in rule.items() if key not in ("Guid", "GUID")}
+            if _matches(current, fields):
+                unchanged += 1
+            else:
+                operations.append(("update", dict(current, **fields)))
+        if delete_unmatched:
+            operations.extend(("delete", current) for current in unmatched)
+
+        def apply(index):
+            action, rule = operations[index]
+            if dry_run:
+                return {"status": "success", "HTTP": None, "msg": "Dry run"}
+            try:
+                if action == "delete":
+                    return self.DeleteEdgeRule(PullZoneID, rule["Guid"])
+                return self.AddorUpdateEdgerule(
+                    PullZoneID,
+                    rule.get("ActionParameter1"),
+                    rule.get("ActionParameter2"),
+                    rule.get("Enabled", True),
+                    rule.get("Description"),
+                    rule.get("ActionType"),
+                    rule.get("TriggerMatchingType"),
+                    rule.get("Triggers"),
+                    GUID=rule.get("Guid") if action == "update" else None,
+                    ExtraActions=rule.get("ExtraActions"),
+                )
+            except Exception as err:
+                return {"status": "error", "HTTP": None, "msg": err}
+
+        outcomes = dict(bounded_map(apply, range(len(operations)), max_workers))
+        results = [
+            dict(
+                outcomes[index],
+                action=action,
+                guid=rule.get("Guid") if action != "add" else None,
+                description=rule.get("Description"),
+            )
+            for index, (action, rule) in enumerate(operations)
+        ]
+        failed = sum(1 for result in results if result["status"] == "error")
+        counts = {action: 0 for action in ("add", "update", "delete")}
+        for action, _ in operations:
+            counts[action] += 1
+        seconds = time.perf_counter() - start
+        return {
+            "status": "error" if failed else "success",
+            "msg": f"{len(operations)} edgerule operations{' (dry run)' if dry_run else ''}",
+            "results": results,
+            "stats": {
+                "added": counts["add"],
+                "updated": counts["update"],
+                "deleted": counts["delete"],
+                "unchanged": unchanged,
+                "failed": failed,
+                "requests": 1 + (0 if dry_run else len(operations)),
+                "seconds": seconds,
+            },
+        }
+
     def AddCustomHostname(self, PullZoneID, Hostname):
         """
         This function is used to add custom hostname to a pullzone
@@ -991,7 +1666,7 @@ class CDN:
         values = json.dumps({"Hostname": Hostname})
 
         try:
-            response = requests.post(
+            response = self.transport.post(
                 self._Geturl(f"pullzone/{PullZoneID}/addHostname"),
                 data=values,
                 headers=self.headers,
@@ -1002,6 +1677,7 @@ class CDN:
         except Exception as err:
             return {"status": "error", "HTTP": response.status_code, "msg": err}
         else:
+            self._invalidate_responses()
             return {
                 "status": "success",
                 "HTTP": response.status_code,
@@ -1024,7 +1700,7 @@ class CDN:
         """
         params = {"Hostname": Hostname}
         try:
-            response = requests.delete(
+            response = self.transport.delete(
                 self._Geturl(f"pullzone/{PullZoneID}/removeHostname"),
                 json=params,
                 headers=self.headers,
@@ -1035,6 +1711,7 @@ class CDN:
         except Exception as err:
             return {"status": "error", "HTTP": response.status_code, "msg": err}
         else:
+            self._invalidate_responses()
             return {
                 "status": "success",
                 "HTTP": response.status_code,
@@ -1062,7 +1739,7 @@ class CDN:
         """
         values = json.dumps({"Hostname": Hostname, "ForceSSL": ForceSSL})
         try:
-            response = requests.post(
+            response = self.transport.post(
                 self._Geturl(f"pullzone/{PullZoneID}/setForceSSL"),
                 data=values,
                 headers=self.headers,
@@ -1073,6 +1750,7 @@ class CDN:
         except Exception as err:
             return {"status": "error", "HTTP": response.status_code, "msg": err}
         else:
+            self._invalidate_responses()
             return {
                 "status": "success",
                 "HTTP": response.status_code,
@@ -1092,7 +1770,7 @@ class CDN:
 
         """
         try:
-            response = requests.get(
+            response = self.transport.get(
                 self._Geturl("pullzone/loadFreeCertificate"),
                 params={"hostname": Hostname},
                 headers=self.headers,
@@ -1103,6 +1781,7 @@ class CDN:
         except Exception as err:
             return {"status": "error", "HTTP": response.status_code, "msg": err}
         else:
+            self._invalidate_responses()
             return self.GetPullZoneList()
 
     def GetVideoLibrary(self, id):
@@ -1116,7 +1795,7 @@ class CDN:
 
         """
         try:
-            response = requests.get(
+            response = self.transport.get(
                 self._Geturl("videolibrary"),
                 params={"id": id},
                 headers=self.headers,
@@ -1143,7 +1822,7 @@ class CDN:
                   The ID of the library that should be deleted
         """
         try:
-            response = requests.delete(
+            response = self.transport.delete(
                 self._Geturl(f"videolibrary/{id}"),
                 headers=self.headers,
             )
@@ -1158,3 +1837,54 @@ class CDN:
                 "HTTP": response.status_code,
                 "msg": "Deleted Video Library",
             }
+
+
+def _diff_config(current, desired):
+    """
+    Returns the fields of desired whose value differs from current,
+    as {field: {"old": current value, "new": desired value}}
+    """
+    return {
+        field: {"old": current.get(field), "new": value}
+        for field, value in desired.items()
+        if current.get(field) != value
+    }
+
+
+def _matches(current, desired):
+    """
+    Tells if current holds every value of desired. Dictionaries are compared
+    on the keys of desired only, lists element by element
+    """
+    if isinstance(desired, dict):
+        return isinstance(current, dict) and all(
+            _matches(current.get(key), value) for key, value in desired.items()
+        )
+    if isinstance(desired, list):
+        return (
+            isinstance(current, list)
+            and len(current) == len(desired)
+            and all(_matches(c, d) for c, d in zip(current, desired))
+        )
+    return current == desired
+
+
+def _network_text(network):
+    """
+    Returns a network as a blocked IP entry: a plain address for a single
+    host, CIDR notation otherwise
+    """
+    if network.prefixlen == network.max_prefixlen:
+        return str(network.network_address)
+    return str(network)
+
+
+def _ip_key(ip):
+    """
+    Returns the normalised form of a blocked IP entry used to compare lists,
+    so "10.0.0.1", "10.0.0.1/32" and " 10.0.0.1" are the same entry
+    """
+    try:
+        return _network_text(ipaddress.ip_network(ip.strip(), strict=False))
+    except ValueError:
+        return ip
@@ -0,0 +1,57 @@
+"""This code provides the bounded worker pool used by the bulk Storage and CDN methods"""
+
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from .Metrics import current_operation, traced
+
+# number of concurrent requests used by the bulk methods, kept below
+# the default pool_maxsize of Transport so every worker keeps its connection
+MAX_WORKERS = 8
+
+
+def bounded_map(function, items, max_workers=MAX_WORKERS):
+    """
+    Runs function on every item using a pool of max_workers threads and yields
+    (item, result) pairs in completion order.
+    items is consumed lazily and at most 2 * max_workers calls are pending at
+    a time, so memory stays bounded and work starts before items is exhausted.
+    Exceptions raised by function are re-raised in the caller.
+    The workers report the operation of the caller in their requests
+    """
+    operation = current_operation()
+    if operation is not None:
+        function = traced(function, operation)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {}
+        for item in items:
+            if len(pending) >= 2 * max_workers:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield pending.pop(future), future.result()
+            pending[executor.submit(function, item)] = item
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield pending.pop(future), future.result()
+
+
+class RateLimiter:
+    """
+    Spaces calls to acquire() from any number of threads so that at most
+    rate of them return per second
+    """
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            wait_until = max(now, self._next)
+            self._next = wait_until + self.interval
+        if wait_until > now:
+            time.sleep(wait_until - now)
@@ -0,0 +1,131 @@
+"""This code provides the persistent index of local file checksums used to skip unchanged uploads"""
+
+import os
+import sqlite3
+import threading
+
+from .Streams import file_checksum
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    inode INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT,
+    storage_path TEXT,
+    remote_checksum TEXT
+)
+"""
+
+
+class HashIndex:
+    """
+    SQLite index mapping a local file, identified by its path, inode, size and
+    modification time, to its SHA-256 and to the Checksum of the storage object
+    it was last uploaded to or compared with. A file whose inode, size and
+    mtime did not change is not read again
+    """
+
+    def __init__(self, path):
+        """
+        Parameters
+        ----------
+        path    : String
+                  The SQLite database file, created if it does not exist
+        """
+        self.path = path
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        # WAL commits do not wait for the disk, so recording every file is cheap
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(_SCHEMA)
+        self._connection.commit()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, local_path, stat=None):
+        """
+        Returns the entry of local_path as a dict with sha256, storage_path and
+        remote_checksum, or None if the file is unknown or changed since
+        """
+        local_path = os.path.abspath(local_path)
+        if stat is None:
+            stat = os.stat(local_path)
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT inode, size, mtime_ns, sha256, storage_path, remote_checksum"
+                " FROM files WHERE path = ?",
+                (local_path,),
+            ).fetchone()
+        if row is None or row[:3] != (stat.st_ino, stat.st_size, stat.st_mtime_ns):
+            return None
+        return {"sha256": row[3], "storage_path": row[4], "remote_checksum": row[5]}
+
+    def checksum(self, local_path, stat=None):
+        """
+        Returns the upper case hex SHA-256 of local_path, reading the file
+        only if the index has no checksum for its current version
+        """
+        if stat is None:
+            stat = os.stat(local_path)
+        entry = self.get(local_path, stat)
+        if entry is not None and entry["sha256"]:
+            with self._lock:
+                self.hits += 1
+            return entry["sha256"]
+        sha256 = file_checksum(local_path)
+        with self._lock:
+            self.misses += 1
+        self.record(local_path, stat, sha256=sha256)
+        return sha256
+
+    def record(self, local_path, stat, sha256=None, storage_path=None, remote_checksum=None):
+        """
+        Stores what is known about the version of local_path described by stat.
+        Values given as None keep what the index holds for that same version
+        """
+        local_path = os.path.abspath(local_path)
+        key = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT inode, size, mtime_ns, sha256, storage_path, remote_checksum"
+                " FROM files WHERE path = ?",
+                (local_path,),
+            ).fetchone()
+            if row is not None and row[:3] == key:
+                sha256 = sha256 or row[3]
+                if storage_path is None:
+                    storage_path, remote_checksum = row[4], remote_checksum or row[5]
+            self._connection.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (local_path,) + key + (sha256, storage_path, remote_checksum),
+            )
+            self._connection.commit()
+
+    def remove(self, local_path):
+        with self._lock:
+            self._connection.execute(
+                "DELETE FROM files WHERE path = ?", (os.path.abspath(local_path),)
+            )
+            self._connection.commit()
+
+    def stats(self):
+        """
+        Returns the number of checksums served from the index (hits) and
+        computed by reading the file (misses), and the number of entries
+        """
+        with self._lock:
+            (entries,) = self._connection.execute("SELECT COUNT(*) FROM files").fetchone()
+            return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,104 @@
+"""This code provides the compact, lazily decoded entries of streamed folder listings"""
+
+import codecs
+import json
+import re
+
+# listing keys returned by the storage API and their names in this library
+METADATA_FIELDS = {
+    "Guid": "guid",
+    "StorageZoneName": "storage_zone_name",
+    "Path": "path",
+    "Length": "length",
+    "LastChanged": "last_changed",
+    "ServerId": "server_id",
+    "ArrayNumber": "array_number",
+    "IsDirectory": "is_directory",
+    "UserId": "user_id",
+    "ContentType": "content_type",
+    "DateCreated": "date_created",
+    "StorageZoneId": "storage_zone_id",
+    "Checksum": "checksum",
+    "ReplicatedZones": "replicated_zones",
+}
+
+# patterns finding the value of each readable field in the raw text. Entries
+# are flat objects, and quotes inside string values are always escaped, so a
+# quoted key followed by a colon can only be a key of the entry itself
+_ATTRIBUTES = {
+    target: re.compile(rf'"{source}"\s*:\s*')
+    for source, target in dict(METADATA_FIELDS, ObjectName="object_name").items()
+}
+
+# whitespace, commas and the opening bracket between array elements
+_SEPARATOR = re.compile(r"[\s,\[]*")
+
+_decoder = json.JSONDecoder()
+
+
+class StorageObject:
+    """
+    One entry of a folder listing, kept as its raw JSON text.
+    Fields are decoded only when they are read, e.g. entry.object_name,
+    entry.is_directory, entry.length or entry.checksum
+    """
+
+    __slots__ = ("_raw",)
+
+    def __init__(self, raw):
+        self._raw = raw
+
+    def __getattr__(self, name):
+        try:
+            pattern = _ATTRIBUTES[name]
+        except KeyError:
+            raise AttributeError(name) from None
+        # only the value of the requested field is decoded
+        match = pattern.search(self._raw)
+        if match is None:
+            return None
+        return _decoder.raw_decode(self._raw, match.end())[0]
+
+    def as_dict(self, include_metadata=False):
+        """
+        Returns the entry in the format of GetStoragedObjectsList
+        """
+        fields = json.loads(self._raw)
+        name_key = "Folder_Name" if fields["IsDirectory"] else "File_Name"
+        entry = {name_key: fields["ObjectName"]}
+        if include_metadata:
+            for source_key, target_key in METADATA_FIELDS.items():
+                if source_key in fields:
+                    entry[target_key] = fields[source_key]
+        return entry
+
+    def __repr__(self):
+        return f"StorageObject({self._raw})"
+
+
+def iter_json_array(chunks):
+    """
+    Incrementally parses a JSON array of objects received as byte chunks and
+    yields the raw text of each element as soon as it is complete, so the
+    whole document is never decoded or held in memory at once
+    """
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    position = 0
+    for chunk in chunks:
+        buffer = buffer[position:] + text_decoder.decode(chunk)
+        position = 0
+        while True:
+            position = _SEPARATOR.match(buffer, position).end()
+            if position >= len(buffer) or buffer[position] == "]":
+                break
+            try:
+                _, end = _decoder.raw_decode(buffer, position)
+            except ValueError:
+                # the element continues in the next chunk
+                break
+            yield buffer[position:end]
+            position = end
+    rest = buffer[position:] + text_decoder.decode(b"", final=True)
+    if rest.strip() not in ("", "]"):
+        raise ValueError("listing ended in the middle of an element")
@@ -0,0 +1,249 @@
+"""This code provides the request hooks of Transport and a metrics collector with a Prometheus exporter"""
+
+import bisect
+import functools
+import inspect
+import threading
+from urllib.parse import urlsplit
+
+# request latency buckets in seconds, upper bounds of the histogram
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# the operation of the current thread, see current_operation
+_operation = threading.local()
+
+
+class RequestEvent:
+    """
+    One request sent by Transport, passed to the hooks before it is sent
+    (with method, url, operation and endpoint set) and again once it completed
+    """
+
+    __slots__ = (
+        "operation",
+        "method",
+        "url",
+        "endpoint",
+        "status",
+        "seconds",
+        "bytes_sent",
+        "bytes_received",
+        "retries",
+        "error",
+    )
+
+    def __init__(self, operation, method, url):
+        # the Storage or CDN method which sent the request, e.g. "PutFile"
+        self.operation = operation
+        self.method = method
+        self.url = url
+        # the url path without the query string
+        self.endpoint = urlsplit(url).path
+        self.status = None
+        self.seconds = 0.0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.retries = 0
+        # the exception raised by the request, if any
+        self.error = None
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"RequestEvent({fields})"
+
+
+class Hook:
+    """
+    Base class of request hooks. Subclasses override either method, which
+    are called on the thread sending the request and must not raise
+    """
+
+    def before_request(self, event):
+        pass
+
+    def after_request(self, event):
+        pass
+
+
+class Counter:
+    """
+    Thread-safe counter of values keyed by a tuple of label values
+    """
+
+    def __init__(self, name, help, labels):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label_values, amount=1):
+        with self._lock:
+            self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def prometheus(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for label_values, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{_labels(self.labels, label_values)} {value}")
+        return lines
+
+
+class Histogram:
+    """
+    Thread-safe histogram of observations keyed by a tuple of label values
+    """
+
+    def __init__(self, name, help, labels, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [count per bucket (the last one for +Inf), sum]
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_values, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self.values.get(label_values)
+            if entry is None:
+                entry = self.values[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def prometheus(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for label_values, (counts, total) in sorted(self.values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    labels = _labels(self.labels + ("le",), label_values + (le,))
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _labels(self.labels, label_values)
+                lines.append(f"{self.name}_sum{labels} {total}")
+                lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsCollector(Hook):
+    """
+    A hook counting requests, errors, retries and bytes, and recording request
+    latency in a histogram, per operation and HTTP method
+    """
+
+    def __init__(self, prefix="bunnycdn", buckets=LATENCY_BUCKETS):
+        self.requests = Counter(
+            f"{prefix}_requests_total", "Requests sent", ("operation", "method", "status")
+        )
+        self.errors = Counter(
+            f"{prefix}_request_errors_total",
+            "Requests which raised an exception",
+            ("operation", "method", "error"),
+        )
+        self.retries = Counter(
+            f"{prefix}_request_retries_total", "Retries of requests", ("operation", "method")
+        )
+        self.bytes_sent = Counter(
+            f"{prefix}_request_bytes_sent_total", "Bytes of request bodies", ("operation", "method")
+        )
+        self.bytes_received = Counter(
+            f"{prefix}_request_bytes_received_total", "Bytes of response bodies", ("operation", "method")
+        )
+        self.latency = Histogram(
+            f"{prefix}_request_duration_seconds",
+            "Request latency including retries",
+            ("operation", "method"),
+            buckets,
+        )
+
+    def after_request(self, event):
+        key = (event.operation or "", event.method)
+        if event.error is not None:
+            self.errors.inc(key + (type(event.error).__name__,))
+        else:
+            self.requests.inc(key + (str(event.status),))
+        if event.retries:
+            self.retries.inc(key, event.retries)
+        if event.bytes_sent:
+            self.bytes_sent.inc(key, event.bytes_sent)
+        if event.bytes_received:
+            self.bytes_received.inc(key, event.bytes_received)
+        self.latency.observe(key, event.seconds)
+
+    def to_prometheus(self):
+        """
+        Returns every metric in the Prometheus text exposition format
+        """
+        lines = []
+        for metric in (
+            self.requests,
+            self.errors,
+            self.retries,
+            self.bytes_sent,
+            self.bytes_received,
+            self.latency,
+        ):
+            lines.extend(metric.prometheus())
+        return "\n".join(lines) + "\n"
+
+
+def current_operation():
+    """
+    Returns the name of the Storage or CDN method running on this thread, set
+    by trace_operations and carried into the workers of bounded_map
+    """
+    return getattr(_operation, "name", None)
+
+
+def traced(function, name=None):
+    """
+    Wraps function so the requests it sends report name, by default the
+    function's name, as their operation
+    """
+    name = name or function.__name__
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        with _OperationScope(name):
+            return function(*args, **kwargs)
+
+    return wrapper
+
+
+def trace_operations(cls):
+    """
+    Class decorator wrapping every public method of cls with traced.
+    Generator methods are left alone, the requests they send come from
+    the public methods they call
+    """
+    for name, value in list(vars(cls).items()):
+        if name[:1].isupper() and inspect.isfunction(value) and not inspect.isgeneratorfunction(value):
+            setattr(cls, name, traced(value))
+    return cls
+
+
+class _OperationScope:
+    __slots__ = ("name", "previous")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        # a public method called by another one reports its own name
+        self.previous = getattr(_operation, "name", None)
+        _operation.name = self.name
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _operation.name = self.previous
+
+
+def _labels(names, values):
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
@@ -0,0 +1,157 @@
+"""This code provides a background queue which debounces and batches URL purges"""
+
+import threading
+import time
+
+from .Concurrency import MAX_WORKERS
+
+
+class PurgeQueue:
+
+    # initializer for the purge queue
+
+    def __init__(self, cdn, debounce=1.0, max_workers=MAX_WORKERS, rate_limit=None):
+        """
+        Starts a background thread which purges the URLs put in the queue.
+        A URL put again while it waits is coalesced into the pending purge, and
+        every URL is purged at most debounce seconds after it was first put
+        Parameters
+        ----------
+        cdn                 : CDN
+                              The CDN object whose PurgeUrls sends the purges
+
+        debounce            : float
+        (optional)            Seconds a URL waits for duplicates before it is purged
+
+        max_workers         : int
+        (optional)            The number of purges of a batch sent concurrently
+
+        rate_limit          : float
+        (optional)            The most purge requests sent per second
+        """
+        self.cdn = cdn
+        self.debounce = debounce
+        self.max_workers = max_workers
+        self.rate_limit = rate_limit
+        # pending URL -> time it was first put
+        self._pending = {}
+        self._condition = threading.Condition()
+        # puts are numbered so flush() knows when its URLs have been sent
+        self._put_seq = 0
+        self._done_seq = 0
+        self._flush_seq = 0
+        self._closed = False
+        self.queued = 0
+        self.coalesced = 0
+        self.sent = 0
+        self.failed = 0
+        self._thread = threading.Thread(target=self._run, name="PurgeQueue", daemon=True)
+        self._thread.start()
+
+    def put(self, url):
+        """
+        Queues url for purging. Safe to call from any thread
+        """
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("PurgeQueue is closed")
+            self.queued += 1
+            self._put_seq += 1
+            if url in self._pending:
+                self.coalesced += 1
+            else:
+                self._pending[url] = time.monotonic()
+                self._condition.notify()
+
+    def flush(self):
+        """
+        Purges every URL queued so far right away and waits until they are sent
+        """
+        with self._condition:
+            target = self._put_seq
+            self._flush_seq = max(self._flush_seq, target)
+            self._condition.notify_all()
+            while self._done_seq < target:
+                self._condition.wait()
+
+    def close(self):
+        """
+        Stops accepting URLs, purges every URL still waiting and stops
+        the background thread
+        """
+        with self._condition:
+            if self._closed:
+                return
+            # closed first, so no put lands after the last batch is taken
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+
+    def stats(self):
+        """
+        Returns the counters of queued, coalesced, sent and failed purges
+        and the number of URLs waiting
+        """
+        with self._condition:
+            return {
+                "queued": self.queued,
+                "coalesced": self.coalesced,
+                "sent": self.sent,
+                "failed": self.failed,
+                "pending": len(self._pending),
+            }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _next_batch(self):
+        """
+        Waits until URLs are due (or a flush is requested) and takes them from
+        the pending set. Returns the batch and the put sequence number it
+        completes, or None once the queue is closed and drained
+        """
+        with self._condition:
+            while True:
+                if self._flush_seq > self._done_seq or (self._closed and self._pending):
+                    batch = list(self._pending)
+                    self._pending.clear()
+                    return batch, self._put_seq
+                if self._closed:
+                    return None
+                if self._pending:
+                    due = time.monotonic() - self.debounce
+                    batch = [url for url, first_put in self._pending.items() if first_put <= due]
+                    if batch:
+                        for url in batch:
+                            del self._pending[url]
+                        # the batch completes every put only if nothing is left waiting
+                        return batch, self._put_seq if not self._pending else self._done_seq
+                    oldest = min(self._pending.values())
+                    self._condition.wait(oldest + self.debounce - time.monotonic())
+                else:
+                    self._condition.wait()
+
+    def _run(self):
+        while True:
+            taken = self._next_batch()
+            if taken is None:
+                return
+            batch, seq = taken
+            sent = failed = 0
+            if batch:
+                try:
+                    result = self.cdn.PurgeUrls(
+                        batch, max_workers=self.max_workers, rate_limit=self.rate_limit
+                    )
+                    sent = result["stats"]["purged"]
+                    failed = result["stats"]["failed"]
+                except Exception:
+                    failed = len(batch)
+            with self._condition:
+                self.sent += sent
+                self.failed += failed
+                self._done_seq = max(self._done_seq, seq)
+                self._condition.notify_all()
@@ -0,0 +1,146 @@
+"""This code provides the latency-aware choice of storage region endpoints used for reads"""
+
+import threading
+import time
+
+from .Concurrency import bounded_map
+
+
+class RegionRouter:
+    """
+    Orders the endpoints of a storage zone's regions for reads, fastest
+    healthy one first. Latency is measured by probing every endpoint, again
+    every probe_interval seconds. An endpoint failing error_threshold reads in
+    a row is demoted to the end of the order for cooldown seconds, after which
+    a single failure demotes it again
+    """
+
+    def __init__(
+        self,
+        endpoints,
+        probe,
+        probe_interval=300,
+        probe_samples=3,
+        error_threshold=3,
+        cooldown=30,
+    ):
+        """
+        Parameters
+        ----------
+        endpoints           : list of String
+                              The base urls of the storage zone in every candidate
+                              region. The first one is the primary region
+        probe               : callable
+                              Sends one request to an endpoint and returns the
+                              response, used to measure its latency
+        probe_interval      : float
+                              Seconds after which the endpoints are probed again
+        probe_samples       : int
+                              Requests sent to each endpoint per probe, the fastest counts
+        error_threshold     : int
+                              Failed reads in a row which demote an endpoint
+        cooldown            : float
+                              Seconds a demoted endpoint stays at the end of the order
+        """
+        self.endpoints = list(dict.fromkeys(endpoints))
+        self.primary = self.endpoints[0]
+        self.probe = probe
+        self.probe_interval = probe_interval
+        self.probe_samples = probe_samples
+        self.error_threshold = error_threshold
+        self.cooldown = cooldown
+        self._latency = dict.fromkeys(self.endpoints)
+        self._errors = dict.fromkeys(self.endpoints, 0)
+        self._demoted_until = dict.fromkeys(self.endpoints, 0.0)
+        self._probed_at = None
+        self._lock = threading.Lock()
+        self._probe_lock = threading.Lock()
+        self.demotions = 0
+
+    def order(self):
+        """
+        Returns the endpoints in the order reads should try them, probing
+        them first if they were never probed or the last probe is too old
+        """
+        if self._probed_at is None or time.monotonic() - self._probed_at > self.probe_interval:
+            # the first caller waits for the probe, later ones use the last order
+            if self._probe_lock.acquire(blocking=self._probed_at is None):
+                try:
+                    if self._probed_at is None or time.monotonic() - self._probed_at > self.probe_interval:
+                        self.measure()
+                finally:
+                    self._probe_lock.release()
+        now = time.monotonic()
+        with self._lock:
+            healthy = [endpoint for endpoint in self.endpoints if self._demoted_until[endpoint] <= now]
+            demoted = [endpoint for endpoint in self.endpoints if self._demoted_until[endpoint] > now]
+            # unmeasured endpoints go last, the primary wins ties
+            healthy.sort(
+                key=lambda endpoint: (
+                    self._latency[endpoint] is None,
+                    self._latency[endpoint] or 0.0,
+                    endpoint != self.primary,
+                )
+            )
+            demoted.sort(key=self._demoted_until.get)
+        return healthy + demoted
+
+    def measure(self):
+        """
+        Probes every endpoint concurrently and stores its latency. Endpoints
+        which fail the probe are demoted
+        """
+
+        def latency(endpoint):
+            best = None
+            for _ in range(self.probe_samples):
+                start = time.perf_counter()
+                try:
+                    response = self.probe(endpoint)
+                    response.close()
+                except Exception:
+                    return None
+                if response.status_code >= 500:
+                    return None
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            return best
+
+        for endpoint, seconds in bounded_map(latency, self.endpoints, len(self.endpoints)):
+            with self._lock:
+                self._latency[endpoint] = seconds
+                if seconds is None:
+                    self._demote(endpoint)
+        self._probed_at = time.monotonic()
+
+    def record_success(self, endpoint):
+        with self._lock:
+            self._errors[endpoint] = 0
+
+    def record_failure(self, endpoint):
+        with self._lock:
+            self._errors[endpoint] += 1
+            if self._errors[endpoint] >= self.error_threshold:
+                self._demote(endpoint)
+
+    def _demote(self, endpoint):
+        self._demoted_until[endpoint] = time.monotonic() + self.cooldown
+        # once back, one more failure demotes it again
+        self._errors[endpoint] = self.error_threshold - 1
+        self.demotions += 1
+
+    def stats(self):
+        """
+        Returns the measured latency in milliseconds (None if unknown),
+        the failed reads in a row and whether it is demoted, per endpoint
+        """
+        now = time.monotonic()
+        with self._lock:
+            return {
+                endpoint: {
+                    "latency_ms": None if self._latency[endpoint] is None else self._latency[endpoint] * 1000,
+                    "errors": self._errors[endpoint],
+                    "demoted": self._demoted_until[endpoint] > now,
+                }
+                for endpoint in self.endpoints
+            }
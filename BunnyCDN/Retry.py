@@ -0,0 +1,132 @@
+"""This code provides the retry policy applied by Transport to every request"""
+
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+# methods which can be sent twice without changing the result
+IDEMPOTENT_METHODS = frozenset(["GET", "HEAD", "OPTIONS", "PUT", "DELETE"])
+
+# responses which mean the request may succeed if it is sent again
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter which honours Retry-After headers.
+    A retry budget refilled by successful requests caps the share of extra
+    requests, so retries cannot multiply the load during an outage
+    """
+
+    def __init__(
+        self,
+        max_retries=3,
+        backoff_factor=0.5,
+        backoff_max=30,
+        statuses=RETRY_STATUSES,
+        methods=IDEMPOTENT_METHODS,
+        budget_ratio=0.2,
+        budget_min=10,
+    ):
+        """
+        Parameters
+        ----------
+        max_retries         : int
+                              Retries after the first attempt of a request
+        backoff_factor      : float
+                              Seconds of the first backoff ceiling, which doubles
+                              with every retry. The wait is drawn uniformly below it
+        backoff_max         : float
+                              The largest wait in seconds. A Retry-After longer than
+                              this is not waited for and the response is returned
+        statuses            : set of int
+                              HTTP statuses which are retried
+        methods             : set of String
+                              HTTP methods which are retried, idempotent ones by default
+        budget_ratio        : float
+                              Retry tokens earned by every request which needs no retry
+        budget_min          : float
+                              Retry tokens available at the start, and the most
+                              which can be saved up is ten times this
+        """
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.statuses = frozenset(statuses)
+        self.methods = frozenset(method.upper() for method in methods)
+        self.budget_ratio = budget_ratio
+        self.budget_max = 10 * budget_min
+        self._tokens = budget_min
+        self._lock = threading.Lock()
+        self.retries = 0
+        self.backoff_seconds = 0.0
+        self.budget_exhausted = 0
+
+    def allows(self, method):
+        return method.upper() in self.methods
+
+    def record_success(self):
+        """
+        Refills the budget after a request which needed no retry
+        """
+        with self._lock:
+            self._tokens = min(self.budget_max, self._tokens + self.budget_ratio)
+
+    def backoff(self, attempt, response=None):
+        """
+        Returns the seconds to wait before retry number attempt + 1,
+        or None if the request should not be retried
+        Parameters
+        ----------
+        attempt     : int
+                      The number of retries already made
+        response    : requests.Response
+                      The retryable response, None after a connection error
+        """
+        if attempt >= self.max_retries:
+            return None
+        delay = self._retry_after(response)
+        if delay is None:
+            delay = random.uniform(0, min(self.backoff_max, self.backoff_factor * 2 ** attempt))
+        elif delay > self.backoff_max:
+            return None
+        with self._lock:
+            if self._tokens < 1:
+                self.budget_exhausted += 1
+                return None
+            self._tokens -= 1
+            self.retries += 1
+            self.backoff_seconds += delay
+        return delay
+
+    def _retry_after(self, response):
+        """
+        Returns the wait asked for by a Retry-After header in seconds, if any
+        """
+        if response is None:
+            return None
+        value = response.headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    def stats(self):
+        """
+        Returns the retry count, total backoff time, the number of retries refused
+        because the budget was empty and the tokens left in the budget
+        """
+        with self._lock:
+            return {
+                "retries": self.retries,
+                "backoff_seconds": self.backoff_seconds,
+                "budget_exhausted": self.budget_exhausted,
+                "budget_tokens": self._tokens,
+            }
@@ -1,16 +1,59 @@
 """This code is to use the BunnyCDN Storage API"""
 
+import json
 import os
-import requests
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from fnmatch import fnmatch
+from requests import exceptions
 from requests.exceptions import HTTPError
 from urllib import parse
 
+from .Cache import TTLCache
+from .Concurrency import MAX_WORKERS, bounded_map
+from .HashIndex import HashIndex
+from .Listing import METADATA_FIELDS, StorageObject, iter_json_array
+from .Metrics import trace_operations
+from .Regions import RegionRouter
+from .Streams import (
+    DOWNLOAD_BUFFER_SIZE,
+    UPLOAD_CHUNK_SIZE,
+    copy_to_buffer,
+    copy_to_file,
+    file_body,
+    file_checksum,
+    hashed_file_body,
+    stream_body,
+)
+from .Transport import Transport
 
+
+# object requested to measure the latency of a region, it does not exist
+PROBE_PATH = ".bunnycdn-latency-probe"
+PROBE_TIMEOUT = 5
+
+
+@trace_operations
 class Storage:
 
     # initializer for storage account
 
-    def __init__(self, api_key, storage_zone, storage_zone_region="de"):
+    def __init__(
+        self,
+        api_key,
+        storage_zone,
+        storage_zone_region="de",
+        transport=None,
+        pool_connections=10,
+        pool_maxsize=10,
+        listing_cache_ttl=0,
+        listing_cache_size=1024,
+        hash_index=None,
+        regions=None,
+        region_probe_interval=300,
+    ):
         """
         Creates an object for using BunnyCDN Storage API
         Parameters
@@ -26,6 +69,47 @@ class Storage:
         storage_zone_region(optional parameter) : String
                                                   The storage zone region code
                                                   as per BunnyCDN
+
+        transport(optional parameter)           : Transport
+                                                  A pooled transport to share
+                                                  with other clients. If None,
+                                                  the object creates and owns one
+
+        pool_connections(optional parameter)    : int
+                                                  Number of per-host pools of
+                                                  the transport created here
+
+        pool_maxsize(optional parameter)        : int
+                                                  Keep-alive connections kept
+                                                  in each host pool
+
+        listing_cache_ttl(optional parameter)   : float
+                                                  Seconds a GetStoragedObjectsList
+                                                  result is cached. 0 disables
+                                                  the listing cache
+
+        listing_cache_size(optional parameter)  : int
+                                                  The number of folder listings
+                                                  kept in the cache
+
+        hash_index(optional parameter)          : String or HashIndex
+                                                  A SQLite file (or an open
+                                                  HashIndex) remembering the
+                                                  SHA-256 of uploaded and synced
+                                                  files, so Sync does not read
+                                                  unchanged files again
+
+        regions(optional parameter)             : list of Strings or String
+                                                  Other regions holding the zone,
+                                                  as region codes (such as the
+                                                  replicated_zones of a listing,
+                                                  "NY,SG") or base urls. Reads go
+                                                  to the fastest healthy region,
+                                                  writes to storage_zone_region
+
+        region_probe_interval(optional parameter): float
+                                                  Seconds after which the latency
+                                                  of the regions is measured again
         """
         self.headers = {
             # headers to be passed in HTTP requests
@@ -38,18 +122,125 @@ class Storage:
         assert storage_zone != "", "storage_zone is not specified/missing"
 
         # For generating base_url for sending requests
-        if storage_zone_region == "de" or storage_zone_region == "":
-            self.base_url = "https://storage.bunnycdn.com/" + storage_zone + "/"
-        else:
-            self.base_url = (
-                "https://"
-                + storage_zone_region
-                + ".storage.bunnycdn.com/"
-                + storage_zone
-                + "/"
+        self.base_url = self._Getbaseurl(storage_zone, storage_zone_region)
+
+        # pooled keep-alive connections reused across calls
+        self._owns_transport = transport is None
+        if transport is None:
+            transport = Transport(
+                pool_connections=pool_connections, pool_maxsize=pool_maxsize
             )
+        self.transport = transport
+
+        # opt-in cache of folder listings, invalidated by uploads and deletes
+        self.listing_cache = None
+        if listing_cache_ttl:
+            self.listing_cache = TTLCache(listing_cache_ttl, listing_cache_size)
+        self._listing_generation = 0
+
+        # latency-aware routing of reads across the zone's regions
+        self.region_router = None
+        if regions:
+            if isinstance(regions, str):
+                regions = regions.split(",")
+            # region codes are lower case in urls, "NY" is ny.storage.bunnycdn.com
+            regions = [region.strip() for region in regions if region.strip()]
+            endpoints = [self.base_url] + [
+                self._Getbaseurl(storage_zone, region if "://" in region else region.lower())
+                for region in regions
+            ]
+            self.region_router = RegionRouter(
+                endpoints, self._probe, probe_interval=region_probe_interval
+            )
+
+        self._owns_hash_index = isinstance(hash_index, str)
+        if self._owns_hash_index:
+            hash_index = HashIndex(hash_index)
+        self.hash_index = hash_index
+
+    @staticmethod
+    def _Getbaseurl(storage_zone, storage_zone_region):
+        """
+        This function is helper for the initializer to create the base url
+        of the storage zone in the given region. A region given as a url
+        (for example a local stand-in server) is used as it is
+        """
+        if "://" in storage_zone_region:
+            return storage_zone_region
+        if storage_zone_region == "de" or storage_zone_region == "":
+            return "https://storage.bunnycdn.com/" + storage_zone + "/"
+        return (
+            "https://"
+            + storage_zone_region
+            + ".storage.bunnycdn.com/"
+            + storage_zone
+            + "/"
+        )
+
+    def _probe(self, endpoint):
+        """
+        Helper function which sends the latency probe of a region: a GET of a
+        missing object, answered quickly without a body worth reading.
+        It is sent without retries so a failing region is seen at once
+        """
+        return self.transport.session.get(
+            endpoint + PROBE_PATH, headers=self.headers, timeout=PROBE_TIMEOUT
+        )
+
+    def _read(self, url, primary=False, **kwargs):
+        """
+        Helper function which sends a GET request for url. With regions it goes to
+        the fastest healthy region and fails over to the next one on a connection
+        error or a 5xx response, only retrying the last one. An object missing from
+        a region which may not have received it yet is read from the primary region.
+        With primary the request goes to the primary region, which has every write
+        """
+        router = self.region_router
+        if router is None or primary:
+            return self.transport.get(url, **kwargs)
+        path = url[len(self.base_url):]
+        endpoints = router.order()
+        for index, endpoint in enumerate(endpoints):
+            last = index == len(endpoints) - 1
+            try:
+                # failing over replaces retries until the last region
+                response = self.transport.get(endpoint + path, retry=last, **kwargs)
+            except (exceptions.ConnectionError, exceptions.Timeout):
+                router.record_failure(endpoint)
+                if last:
+                    raise
+                continue
+            if response.status_code >= 500:
+                router.record_failure(endpoint)
+                if last:
+                    return response
+                response.close()
+                continue
+            router.record_success(endpoint)
+            if response.status_code == 404 and endpoint != router.primary:
+                response.close()
+                return self.transport.get(url, **kwargs)
+            return response
+
+    def close(self):
+        """
+        Closes the pooled connections if the transport is owned by this object,
+        and the hash index if it was opened by this object
+        """
+        if self._owns_transport:
+            self.transport.close()
+        if self._owns_hash_index:
+            self.hash_index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
-    def DownloadFile(self, storage_path, download_path=os.getcwd()):
+    def DownloadFile(
+        self, storage_path, download_path=os.getcwd(), buffer_size=DOWNLOAD_BUFFER_SIZE
+    ):
         """
         This function will get the files and subfolders of storage zone mentioned in path
         and download it to the download_path location mentioned
@@ -61,6 +252,8 @@ class Storage:
                         from which files are to be retrieved
         download_path : String
                         The directory on local server to which downloaded file must be saved
+        buffer_size   : int
+        (optional)      The size in bytes of the reusable buffer the response is read into
         Note:For download_path instead of '\' '\\' should be used example: C:\\Users\\XYZ\\OneDrive
         """
 
@@ -68,16 +261,43 @@ class Storage:
             storage_path != ""
         ), "storage_path must be specified"  # to make sure storage_path is not null
         # to build correct url
-        if storage_path[0] == "/":
-            storage_path = storage_path[1:]
-        if storage_path[-1] == "/":
-            storage_path = storage_path[:-1]
-        url = self.base_url + parse.quote(storage_path)
+        url = self._Geturl(storage_path)
         file_name = url.split("/")[-1]  # For storing file name
+        download_path = os.path.join(download_path, file_name)
+        return self._download(url, download_path, buffer_size)
+
+    def DownloadFileObject(self, storage_path, destination, buffer_size=DOWNLOAD_BUFFER_SIZE):
+        """
+        This function downloads a file of the storage zone into an open file
+        object or a caller-provided buffer without intermediate copies per chunk
+        Parameters
+        ----------
+        storage_path  : String
+                        The path of the file (including file name and excluding
+                        storage zone name) which is to be downloaded
+        destination   : file-like object, bytearray or memoryview
+                        An object with a write() method, or a writable buffer
+                        which the response is read into directly. The "bytes"
+                        key of the result tells how much of the buffer was filled
+        buffer_size   : int
+        (optional)      The size in bytes of the reusable buffer the response is read into
+        """
+        assert (
+            storage_path != ""
+        ), "storage_path must be specified"  # to make sure storage_path is not null
+        return self._download(self._Geturl(storage_path), destination, buffer_size)
+
+    def _download(self, url, destination, buffer_size):
+        """
+        Helper function which streams url into destination, which may be a local
+        path, a writable file object or a writable buffer
+        """
+        # identity encoding so the raw stream can be read into the buffer as is
+        headers = dict(self.headers, **{"Accept-Encoding": "identity"})
 
         # to return appropriate help messages if file is present or not and download file if present
         try:
-            response = requests.get(url, headers=self.headers, stream=True)
+            response = self._read(url, headers=headers, stream=True)
             response.raise_for_status()
         except HTTPError as http:
             return {
@@ -92,24 +312,176 @@ class Storage:
                 "msg": f"error occured {err}",
             }
         else:
-            download_path = os.path.join(download_path, file_name)
-            # Downloading file
-            with open(download_path, "wb") as file:
+            with response:
+                try:
+                    if isinstance(destination, (str, os.PathLike)):
+                        # Downloading file
+                        with open(destination, "wb") as file:
+                            size = copy_to_file(response.raw, file, buffer_size)
+                    elif hasattr(destination, "write"):
+                        size = copy_to_file(response.raw, destination, buffer_size)
+                    else:
+                        size = copy_to_buffer(response.raw, destination, buffer_size)
+                except BufferError as err:
+                    return {
+                        "status": "error",
+                        "HTTP": response.status_code,
+                        "msg": f"error occured {err}",
+                    }
+            return {
+                "status": "success",
+                "HTTP": response.status_code,
+                "msg": "File downloaded Successfully",
+                "bytes": size,
+            }
+
+    def DownloadFileSegmented(
+        self,
+        storage_path,
+        download_path=os.getcwd(),
+        segments=MAX_WORKERS,
+        max_workers=MAX_WORKERS,
+        buffer_size=DOWNLOAD_BUFFER_SIZE,
+    ):
+        """
+        This function downloads a large file as concurrent HTTP Range segments, each
+        written at its own offset of a pre-allocated local file, and verifies the
+        result against the remote Checksum.
+        Completed segments are recorded next to the file in "<file name>.segments",
+        so an interrupted download resumes with the missing segments only
+        Parameters
+        ----------
+        storage_path  : String
+                        The path of the file
+                        (including file name and excluding storage zone name)
+                        which is to be downloaded
+        download_path : String
+        (optional)      The directory on local server to which downloaded file must be saved
+        segments      : int
+        (optional)      The number of Range requests the file is split into
+        max_workers   : int
+        (optional)      The number of segments downloaded concurrently
+        buffer_size   : int
+        (optional)      The size in bytes of each worker's read buffer
+        """
+        assert (
+            storage_path != ""
+        ), "storage_path must be specified"  # to make sure storage_path is not null
+        storage_path = storage_path.strip("/")
+        folder, _, file_name = storage_path.rpartition("/")
+        url = self._Geturl(storage_path)
 
-                for chunk in response.iter_content(chunk_size=1024):
-                    if chunk:
-                        file.write(chunk)
+        # the listing of the parent folder gives the size and checksum
+        listing = self.GetStoragedObjectsList(folder or None, include_metadata=True, primary=True)
+        if isinstance(listing, dict):
+            return listing
+        entry = next((e for e in listing if e.get("File_Name") == file_name), None)
+        if entry is None:
+            return {"status": "error", "HTTP": 404, "msg": f"{storage_path} was not found"}
+        size = entry["length"]
+        checksum = (entry.get("checksum") or "").upper()
+
+        local_path = os.path.join(download_path, url.split("/")[-1])
+        state_path = local_path + ".segments"
+        segment_size = max(1, -(-size // max(1, segments)))
+        ranges = [(start, min(start + segment_size, size) - 1) for start in range(0, size, segment_size)]
+
+        # completed segments of an earlier attempt of the same remote file
+        done = set()
+        try:
+            with open(state_path) as file:
+                state = json.load(file)
+            if (state["size"], state["checksum"], state["segment_size"]) == (size, checksum, segment_size):
+                done = {tuple(r) for r in state["done"]}
+        except (OSError, ValueError, KeyError):
+            pass
+        if not done or not os.path.exists(local_path):
+            done = set()
+            with open(local_path, "wb") as file:
+                file.truncate(size)
+        state_lock = threading.Lock()
+
+        def save_state():
+            with open(state_path + ".tmp", "w") as file:
+                json.dump(
+                    {
+                        "size": size,
+                        "checksum": checksum,
+                        "segment_size": segment_size,
+                        "done": sorted(done),
+                    },
+                    file,
+                )
+            os.replace(state_path + ".tmp", state_path)
+
+        def fetch(byte_range):
+            start, end = byte_range
+            headers = dict(
+                self.headers, **{"Range": f"bytes={start}-{end}", "Accept-Encoding": "identity"}
+            )
+            try:
+                with self._read(url, headers=headers, stream=True) as response:
+                    response.raise_for_status()
+                    if response.status_code != 206:
+                        return {
+                            "status": "error",
+                            "HTTP": response.status_code,
+                            "msg": "the server ignored the Range request",
+                        }
+                    with open(local_path, "r+b") as file:
+                        file.seek(start)
+                        written = copy_to_file(response.raw, file, buffer_size)
+            except Exception as err:
+                return {"status": "error", "HTTP": None, "msg": f"error occured {err}"}
+            if written != end - start + 1:
                 return {
-                    "status": "success",
+                    "status": "error",
                     "HTTP": response.status_code,
-                    "msg": "File downloaded Successfully",
+                    "msg": f"segment {start}-{end} is incomplete",
                 }
+            with state_lock:
+                done.add(byte_range)
+                save_state()
+            return {"status": "success", "HTTP": response.status_code}
+
+        missing = [r for r in ranges if r not in done]
+        failed = [
+            result
+            for _, result in bounded_map(fetch, missing, max_workers)
+            if result["status"] != "success"
+        ]
+        if failed:
+            return dict(
+                failed[0],
+                msg=f"{len(failed)} of {len(ranges)} segments failed, "
+                f"rerun to resume: {failed[0]['msg']}",
+            )
+
+        if checksum and file_checksum(local_path) != checksum:
+            # start over next time instead of resuming corrupt data
+            if os.path.exists(state_path):
+                os.remove(state_path)
+            return {
+                "status": "error",
+                "HTTP": 200,
+                "msg": "Checksum of the downloaded file does not match the storage zone",
+            }
+        if os.path.exists(state_path):
+            os.remove(state_path)
+        return {
+            "status": "success",
+            "HTTP": 206,
+            "msg": "File downloaded Successfully",
+            "bytes": size,
+            "resumed_segments": len(ranges) - len(missing),
+        }
 
     def PutFile(
         self,
         file_name,
         storage_path=None,
         local_upload_file_path=os.getcwd(),
+        chunk_size=UPLOAD_CHUNK_SIZE,
     ):
         """
         This function uploads files to your BunnyCDN storage zone
@@ -124,6 +496,9 @@ class Storage:
         local_upload_file_path      : String
                                       The path of file as stored in local server(excluding file name)
                                       from where file is to be uploaded
+        chunk_size(optional)        : int
+                                      The size in bytes of each chunk sent, the file is never
+                                      read into memory as a whole
         Examples
         --------
         file_name                   : 'ABC.txt'
@@ -135,16 +510,630 @@ class Storage:
 
         # to build correct url
         if storage_path is not None and storage_path != "":
-            if storage_path[0] == "/":
-                storage_path = storage_path[1:]
-            if storage_path[-1] == "/":
-                storage_path = storage_path[:-1]
-            url = self.base_url + parse.quote(storage_path)
+            url = self._Geturl(storage_path)
         else:
-            url = self.base_url + parse.quote(file_name)
-        with open(local_upload_file_path, "rb") as file:
-            file_data = file.read()
-        response = requests.put(url, data=file_data, headers=self.headers)
+            url = self._Geturl(file_name)
+        # the file is memory mapped and sent in bounded chunks
+        if self.hash_index is None:
+            body = file_body(local_upload_file_path, chunk_size)
+            return self._upload(url, body, storage_path or file_name)
+
+        # the checksum is computed from the chunks sent and recorded as the
+        # remote Checksum, unless the file changed during the upload
+        stat = os.stat(local_upload_file_path)
+        body, checksum = hashed_file_body(local_upload_file_path, chunk_size)
+        result = self._upload(url, body, storage_path or file_name)
+        if result["status"] == "success" and checksum() is not None:
+            after = os.stat(local_upload_file_path)
+            if (after.st_ino, after.st_size, after.st_mtime_ns) == (
+                stat.st_ino,
+                stat.st_size,
+                stat.st_mtime_ns,
+            ):
+                self.hash_index.record(
+                    local_upload_file_path,
+                    stat,
+                    sha256=checksum(),
+                    storage_path=(storage_path or file_name).strip("/"),
+                    remote_checksum=checksum(),
+                )
+        return result
+
+    def PutFileObject(
+        self, file_object, storage_path, content_length=None, chunk_size=UPLOAD_CHUNK_SIZE
+    ):
+        """
+        This function uploads the content of a file-like object or byte iterator
+        to your BunnyCDN storage zone without holding it in memory
+        Parameters
+        ----------
+        file_object                 : file-like object or iterable of bytes
+                                      The source of the data. Objects with a read()
+                                      method are read chunk_size bytes at a time
+        storage_path                : String
+                                      The path of directory in storage zone
+                                      (including the name of file as desired and excluding storage zone name)
+                                      to which file is to be uploaded
+        content_length(optional)    : int
+                                      The size of the upload in bytes. If it is not given
+                                      and cannot be found from file_object the upload is sent
+                                      with chunked transfer encoding
+        chunk_size(optional)        : int
+                                      The size in bytes of each chunk sent
+        """
+        assert (
+            storage_path is not None and storage_path != ""
+        ), "storage_path must be specified"
+        body = stream_body(file_object, content_length, chunk_size)
+        return self._upload(self._Geturl(storage_path), body, storage_path)
+
+    def PutBytes(self, data, storage_path):
+        """
+        This function uploads data held in memory to your BunnyCDN storage zone.
+        A contiguous buffer is sent as it is, without being copied or written to disk
+        Parameters
+        ----------
+        data                        : bytes, bytearray, memoryview or other bytes-like object
+                                      The content of the file. It must not be changed
+                                      until the upload returns
+        storage_path                : String
+                                      The path of directory in storage zone
+                                      (including the name of file as desired and excluding storage zone name)
+                                      to which file is to be uploaded
+        """
+        assert (
+            storage_path is not None and storage_path != ""
+        ), "storage_path must be specified"
+        if not isinstance(data, bytes):
+            view = memoryview(data)
+            # a flat byte view of the same memory, so the length is in bytes.
+            # Non-contiguous buffers cannot be viewed flat and are copied
+            data = view.cast("B") if view.c_contiguous else view.tobytes()
+        return self._upload(self._Geturl(storage_path), data, storage_path)
+
+    def PutStream(self, iterable, storage_path, content_length=None):
+        """
+        This function uploads content generated as an iterable of byte chunks
+        to your BunnyCDN storage zone as it is produced
+        Parameters
+        ----------
+        iterable                    : iterable of bytes
+                                      The chunks of the file, in order
+        storage_path                : String
+                                      The path of directory in storage zone
+                                      (including the name of file as desired and excluding storage zone name)
+                                      to which file is to be uploaded
+        content_length(optional)    : int
+                                      The total size of the chunks in bytes. If it is not given
+                                      the upload is sent with chunked transfer encoding
+        """
+        assert (
+            storage_path is not None and storage_path != ""
+        ), "storage_path must be specified"
+        body = stream_body(iterable, content_length)
+        return self._upload(self._Geturl(storage_path), body, storage_path)
+
+    def UploadDirectory(
+        self,
+        local_dir,
+        remote_prefix="",
+        include=None,
+        exclude=None,
+        max_workers=MAX_WORKERS,
+    ):
+        """
+        This function uploads every file of a local directory tree to the storage zone
+        using a bounded pool of workers over the pooled connections
+        Parameters
+        ----------
+        local_dir                   : String
+                                      The local directory whose files are to be uploaded
+        remote_prefix(optional)     : String
+                                      The directory in storage zone (excluding storage zone name)
+                                      under which the tree is uploaded. Leading and trailing
+                                      slashes are ignored
+        include(optional)           : String or list of Strings
+                                      Glob patterns matched against the path relative to
+                                      local_dir (example: '*.html'). Only matching files are uploaded
+        exclude(optional)           : String or list of Strings
+                                      Glob patterns of relative paths which are not uploaded
+        max_workers(optional)       : int
+                                      The number of concurrent uploads. Keep it at or below
+                                      the pool_maxsize of the transport
+        Returns
+        -------
+        dict with the overall "status", a "msg", the per-file "results" and "stats"
+        holding files, uploaded, failed, bytes, seconds, MBps and files_per_second
+        """
+        remote_prefix = remote_prefix.strip("/")
+        sizes = {}
+
+        def local_files():
+            for local_path, relative_path in self._iter_local_files(local_dir, include, exclude):
+                sizes[local_path] = os.path.getsize(local_path)
+                yield local_path, relative_path
+
+        def upload(item):
+            local_path, relative_path = item
+            storage_path = f"{remote_prefix}/{relative_path}" if remote_prefix else relative_path
+            try:
+                result = self.PutFile(
+                    os.path.basename(local_path), storage_path, os.path.dirname(local_path)
+                )
+            except Exception as err:
+                result = {"status": "error", "HTTP": None, "msg": f"error occured {err}"}
+            return dict(result, local_path=local_path, storage_path=storage_path)
+
+        start = time.perf_counter()
+        results = [result for _, result in bounded_map(upload, local_files(), max_workers)]
+        seconds = time.perf_counter() - start
+
+        uploaded = [r for r in results if r["status"] == "success"]
+        uploaded_bytes = sum(sizes[r["local_path"]] for r in uploaded)
+        failed = len(results) - len(uploaded)
+        return {
+            "status": "success" if failed == 0 else "error",
+            "msg": f"Uploaded {len(uploaded)} of {len(results)} files",
+            "results": results,
+            "stats": {
+                "files": len(results),
+                "uploaded": len(uploaded),
+                "failed": failed,
+                "bytes": uploaded_bytes,
+                "seconds": seconds,
+                "MBps": uploaded_bytes / (1024 * 1024) / seconds if seconds else 0.0,
+                "files_per_second": len(results) / seconds if seconds else 0.0,
+            },
+        }
+
+    def Sync(
+        self,
+        local_dir,
+        remote_prefix="",
+        delete_orphans=False,
+        include=None,
+        exclude=None,
+        max_workers=MAX_WORKERS,
+    ):
+        """
+        This function makes a directory of the storage zone match a local directory,
+        uploading only the files which are new or whose SHA-256 differs from the
+        remote Checksum
+        Parameters
+        ----------
+        local_dir                   : String
+                                      The local directory to be synced
+        remote_prefix(optional)     : String
+                                      The directory in storage zone (excluding storage zone name)
+                                      which mirrors local_dir
+        delete_orphans(optional)    : bool
+                                      If True, remote files under remote_prefix which do not
+                                      exist locally are deleted
+        include(optional)           : String or list of Strings
+                                      Glob patterns matched against relative paths. Only matching
+                                      files are uploaded or considered for deletion
+        exclude(optional)           : String or list of Strings
+                                      Glob patterns of relative paths which are left alone
+        max_workers(optional)       : int
+                                      The number of concurrent listings, hashes and uploads
+        Returns
+        -------
+        dict with the overall "status", a "msg", the "results" of every file with its
+        "action" (uploaded, unchanged, deleted or the failed one) and "stats" holding
+        files, uploaded, unchanged, deleted, failed and seconds
+        """
+        remote_prefix = remote_prefix.strip("/")
+        start = time.perf_counter()
+        results = []
+
+        def listing_failed(folder, error):
+            results.append(dict(error, storage_path=folder, local_path=None, action="list"))
+
+        # remote state of the tree, keyed by path relative to remote_prefix
+        remote = {}
+        for folder, _, files in self.Walk(
+            remote_prefix, max_workers, include_metadata=True, onerror=listing_failed, primary=True
+        ):
+            for entry in files:
+                storage_path = f"{folder}/{entry['File_Name']}".lstrip("/")
+                remote[storage_path[len(remote_prefix):].lstrip("/")] = entry
+
+        def sync_file(item):
+            local_path, relative_path = item
+            storage_path = f"{remote_prefix}/{relative_path}" if remote_prefix else relative_path
+            entry = remote.get(relative_path)
+            try:
+                if entry is not None and self._is_unchanged(local_path, storage_path, entry):
+                    result = {"status": "success", "HTTP": None, "msg": "File is unchanged"}
+                    action = "unchanged"
+                else:
+                    result = self.PutFile(
+                        os.path.basename(local_path), storage_path, os.path.dirname(local_path)
+                    )
+                    action = "uploaded"
+            except Exception as err:
+                result = {"status": "error", "HTTP": None, "msg": f"error occured {err}"}
+                action = "uploaded"
+            return dict(result, local_path=local_path, storage_path=storage_path, action=action)
+
+        local = set()
+
+        def local_files():
+            for local_path, relative_path in self._iter_local_files(local_dir, include, exclude):
+                local.add(relative_path)
+                yield local_path, relative_path
+
+        for _, result in bounded_map(sync_file, local_files(), max_workers):
+            results.append(result)
+
+        if delete_orphans:
+
+            def delete(relative_path):
+                storage_path = f"{remote_prefix}/{relative_path}" if remote_prefix else relative_path
+                try:
+                    result = self.DeleteFile(storage_path)
+                except Exception as err:
+                    result = {"status": "error", "HTTP": None, "msg": f"error occured {err}"}
+                return dict(result, local_path=None, storage_path=storage_path, action="deleted")
+
+            orphans = (
+                relative_path
+                for relative_path in remote
+                if relative_path not in local and self._is_selected(relative_path, include, exclude)
+            )
+            for _, result in bounded_map(delete, orphans, max_workers):
+                results.append(result)
+
+        seconds = time.perf_counter() - start
+        succeeded = [r for r in results if r["status"] == "success"]
+        failed = len(results) - len(succeeded)
+        counts = {
+            action: sum(1 for r in succeeded if r["action"] == action)
+            for action in ("uploaded", "unchanged", "deleted")
+        }
+        return {
+            "status": "success" if failed == 0 else "error",
+            "msg": f"Uploaded {counts['uploaded']}, deleted {counts['deleted']} "
+            f"and skipped {counts['unchanged']} unchanged files",
+            "results": results,
+            "stats": dict(counts, files=len(local), failed=failed, seconds=seconds),
+        }
+
+    def _is_unchanged(self, local_path, storage_path, entry):
+        """
+        Tells if the local file has the content of the storage object described
+        by the listing entry. A different length means changed without reading
+        the file, and with a hash index a known file is not read at all
+        """
+        stat = os.stat(local_path)
+        if entry.get("length") != stat.st_size:
+            return False
+        remote_checksum = (entry.get("checksum") or "").upper()
+        index = self.hash_index
+        if index is None:
+            return remote_checksum == file_checksum(local_path)
+        known = index.get(local_path, stat)
+        if known is not None and known["storage_path"] == storage_path and known["remote_checksum"]:
+            # this version of the file was uploaded to or compared with the object.
+            # Listings may lack a checksum, then the one last seen is trusted
+            if remote_checksum in ("", known["remote_checksum"]):
+                return True
+        if not remote_checksum or index.checksum(local_path, stat) != remote_checksum:
+            return False
+        index.record(local_path, stat, storage_path=storage_path, remote_checksum=remote_checksum)
+        return True
+
+    def DownloadTree(
+        self,
+        remote_prefix,
+        local_dir=os.getcwd(),
+        include=None,
+        exclude=None,
+        max_workers=MAX_WORKERS,
+        buffer_size=DOWNLOAD_BUFFER_SIZE,
+    ):
+        """
+        This function downloads every file under a directory of the storage zone,
+        recreating the remote folder structure inside local_dir.
+        Folders are listed while downloads run on a bounded pool of workers, so the
+        first files are fetched before the whole tree has been listed
+        Parameters
+        ----------
+        remote_prefix               : String
+                                      The directory in storage zone (excluding storage zone name)
+                                      to download. Use "" or "/" for the whole storage zone
+        local_dir(optional)         : String
+                                      The local directory the tree is downloaded into
+        include(optional)           : String or list of Strings
+                                      Glob patterns matched against the path relative to
+                                      remote_prefix. Only matching files are downloaded
+        exclude(optional)           : String or list of Strings
+                                      Glob patterns of relative paths which are not downloaded
+        max_workers(optional)       : int
+                                      The number of concurrent downloads. Keep it at or below
+                                      the pool_maxsize of the transport
+        buffer_size(optional)       : int
+                                      The size in bytes of each worker's read buffer
+        Returns
+        -------
+        dict with the overall "status", a "msg", the per-file "results" and "stats"
+        holding files, downloaded, failed, bytes, seconds, MBps and files_per_second
+        """
+        remote_prefix = remote_prefix.strip("/")
+        results = []
+
+        def remote_files():
+            # a small listing fan-out keeps most pooled connections for downloads
+            for folder, _, files in self.Walk(
+                remote_prefix, max(1, max_workers // 4), onerror=listing_failed
+            ):
+                for entry in files:
+                    storage_path = f"{folder}/{entry['File_Name']}".lstrip("/")
+                    relative_path = storage_path[len(remote_prefix):].lstrip("/")
+                    if self._is_selected(relative_path, include, exclude):
+                        yield storage_path, os.path.join(local_dir, *relative_path.split("/"))
+
+        def listing_failed(folder, error):
+            results.append(dict(error, storage_path=folder, local_path=None))
+
+        def download(item):
+            storage_path, local_path = item
+            try:
+                os.makedirs(os.path.dirname(local_path), exist_ok=True)
+                result = self._download(self._Geturl(storage_path), local_path, buffer_size)
+            except Exception as err:
+                result = {"status": "error", "HTTP": None, "msg": f"error occured {err}"}
+            return dict(result, storage_path=storage_path, local_path=local_path)
+
+        start = time.perf_counter()
+        for _, result in bounded_map(download, remote_files(), max_workers):
+            results.append(result)
+        seconds = time.perf_counter() - start
+
+        downloaded = [r for r in results if r["status"] == "success"]
+        downloaded_bytes = sum(r["bytes"] for r in downloaded)
+        failed = len(results) - len(downloaded)
+        return {
+            "status": "success" if failed == 0 else "error",
+            "msg": f"Downloaded {len(downloaded)} of {len(results)} files",
+            "results": results,
+            "stats": {
+                "files": len(results),
+                "downloaded": len(downloaded),
+                "failed": failed,
+                "bytes": downloaded_bytes,
+                "seconds": seconds,
+                "MBps": downloaded_bytes / (1024 * 1024) / seconds if seconds else 0.0,
+                "files_per_second": len(results) / seconds if seconds else 0.0,
+            },
+        }
+
+    def DeleteTree(
+        self,
+        prefix,
+        include=None,
+        exclude=None,
+        max_workers=MAX_WORKERS,
+        dry_run=False,
+    ):
+        """
+        This function deletes a directory of the storage zone with everything below it.
+        Files are deleted on a bounded pool of workers while the tree is listed, then the
+        emptied folders are deleted, deepest first
+        Parameters
+        ----------
+        prefix                      : String
+                                      The directory in storage zone (excluding storage zone name)
+                                      to delete. Use "" or "/" to empty the whole storage zone
+        include(optional)           : String or list of Strings
+                                      Glob patterns matched against the path relative to
+                                      prefix. Only matching files are deleted
+        exclude(optional)           : String or list of Strings
+                                      Glob patterns of relative paths which are not deleted.
+                                      With include or exclude the folders are kept
+        max_workers(optional)       : int
+                                      The number of concurrent deletes
+        dry_run(optional)           : bool
+                                      If True nothing is deleted and the results list what would be
+        Returns
+        -------
+        dict with the overall "status", a "msg", the "results" of every file and folder and
+        "stats" holding files, folders, deleted, failed, bytes (freed) and seconds
+        """
+        prefix = prefix.strip("/")
+        keep_folders = include is not None or exclude is not None
+        results = []
+        # folders whose content is not known to be gone, so they must stay
+        blocked = set()
+        folders = []
+        sizes = {}
+
+        def listing_failed(folder, error):
+            blocked.add(folder)
+            results.append(dict(error, storage_path=folder, action="list"))
+
+        def remote_files():
+            for folder, _, files in self.Walk(
+                prefix,
+                max(1, max_workers // 4),
+                include_metadata=True,
+                onerror=listing_failed,
+                primary=True,
+            ):
+                folders.append(folder)
+                for entry in files:
+                    storage_path = f"{folder}/{entry['File_Name']}".lstrip("/")
+                    if self._is_selected(storage_path[len(prefix):].lstrip("/"), include, exclude):
+                        sizes[storage_path] = entry.get("length") or 0
+                        yield storage_path
+
+        def delete(storage_path):
+            if dry_run:
+                return {"status": "success", "HTTP": None, "msg": "Dry run"}
+            try:
+                return self.DeleteFile(storage_path)
+            except Exception as err:
+                return {"status": "error", "HTTP": None, "msg": f"error occured {err}"}
+
+        start = time.perf_counter()
+        for storage_path, result in bounded_map(delete, remote_files(), max_workers):
+            if result["status"] != "success":
+                blocked.add(storage_path.rpartition("/")[0])
+            results.append(dict(result, storage_path=storage_path, action="delete_file"))
+
+        if not keep_folders:
+            for folder in list(blocked):
+                while folder:
+                    folder = folder.rpartition("/")[0]
+                    blocked.add(folder)
+            # folders of one depth are deleted together, after every deeper one
+            by_depth = {}
+            for folder in folders:
+                if folder and folder not in blocked:
+                    by_depth.setdefault(folder.count("/"), []).append(folder + "/")
+            for depth in sorted(by_depth, reverse=True):
+                for folder, result in bounded_map(delete, by_depth[depth], max_workers):
+                    results.append(dict(result, storage_path=folder, action="delete_folder"))
+
+        seconds = time.perf_counter() - start
+        deleted = [r for r in results if r["status"] == "success"]
+        freed = sum(sizes.get(r["storage_path"], 0) for r in deleted if r["action"] == "delete_file")
+        failed = len(results) - len(deleted)
+        verb = "Would delete" if dry_run else "Deleted"
+        return {
+            "status": "success" if failed == 0 else "error",
+            "msg": f"{verb} {len(deleted)} objects freeing {freed} bytes",
+            "results": results,
+            "stats": {
+                "files": sum(1 for r in results if r["action"] == "delete_file"),
+                "folders": sum(1 for r in results if r["action"] == "delete_folder"),
+                "deleted": len(deleted),
+                "failed": failed,
+                "bytes": freed,
+                "seconds": seconds,
+            },
+        }
+
+    def Walk(
+        self,
+        prefix="",
+        max_workers=MAX_WORKERS,
+        max_depth=None,
+        include_metadata=False,
+        onerror=None,
+        primary=False,
+    ):
+        """
+        This generator walks the tree under prefix like os.walk, listing up to
+        max_workers folders concurrently and yielding each folder as soon as its
+        listing arrives, so the whole tree is never held in memory
+        Parameters
+        ----------
+        prefix(optional)            : String
+                                      The directory in storage zone (excluding storage zone name)
+                                      to walk. Use "" or "/" for the whole storage zone
+        max_workers(optional)       : int
+                                      The number of folders listed concurrently
+        max_depth(optional)         : int
+                                      How many levels below prefix are listed.
+                                      0 lists only prefix, None walks the whole tree
+        include_metadata(optional)  : bool
+                                      Passed to GetStoragedObjectsList for every folder
+        onerror(optional)           : callable
+                                      Called with (folder, error dictionary) for every folder
+                                      which cannot be listed. Such folders are skipped
+        primary(optional)           : bool
+                                      Passed to GetStoragedObjectsList for every folder
+        Yields
+        ------
+        (folder, folders, files) where folder is the path of the listed folder without
+        leading or trailing slash and folders and files are the entries of its listing
+        as returned by GetStoragedObjectsList. Like os.walk, removing entries from
+        folders before resuming the generator stops them from being walked
+        """
+        queued = deque([(prefix.strip("/"), 0)])
+        pending = {}
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            while queued or pending:
+                while queued and len(pending) < 2 * max_workers:
+                    folder, depth = queued.popleft()
+                    future = executor.submit(
+                        self.GetStoragedObjectsList, folder or None, include_metadata, primary
+                    )
+                    pending[future] = (folder, depth)
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    folder, depth = pending.pop(future)
+                    try:
+                        listing = future.result()
+                    except Exception as err:
+                        # a connection failing after its retries skips the folder too
+                        listing = {"status": "error", "HTTP": None, "msg": err}
+                    if isinstance(listing, dict):
+                        if onerror is not None:
+                            onerror(folder, listing)
+                        continue
+                    folders = [entry for entry in listing if "Folder_Name" in entry]
+                    files = [entry for entry in listing if "Folder_Name" not in entry]
+                    yield folder, folders, files
+                    if max_depth is None or depth < max_depth:
+                        for entry in folders:
+                            queued.append(
+                                (f"{folder}/{entry['Folder_Name']}".lstrip("/"), depth + 1)
+                            )
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown()
+
+    def _iter_local_files(self, local_dir, include=None, exclude=None):
+        """
+        Helper generator which walks local_dir and yields (local_path, relative_path)
+        for every selected file, relative_path using "/" as separator
+        """
+        for root, _, files in os.walk(local_dir):
+            for name in files:
+                local_path = os.path.join(root, name)
+                relative_path = os.path.relpath(local_path, local_dir).replace(os.sep, "/")
+                if self._is_selected(relative_path, include, exclude):
+                    yield local_path, relative_path
+
+    def _is_selected(self, relative_path, include=None, exclude=None):
+        """
+        Helper function which tells if relative_path matches one of the include
+        glob patterns (if any are given) and none of the exclude patterns
+        """
+        if isinstance(include, str):
+            include = [include]
+        if isinstance(exclude, str):
+            exclude = [exclude]
+        if include and not any(fnmatch(relative_path, pattern) for pattern in include):
+            return False
+        if exclude and any(fnmatch(relative_path, pattern) for pattern in exclude):
+            return False
+        return True
+
+    def _Geturl(self, storage_path):
+        """
+        This function is helper for the other methods in code
+        to create appropriate url of an object in the storage zone
+        """
+        if storage_path[0] == "/":
+            storage_path = storage_path[1:]
+        if storage_path[-1] == "/":
+            storage_path = storage_path[:-1]
+        return self.base_url + parse.quote(storage_path)
+
+    def _upload(self, url, body, storage_path):
+        """
+        Helper function which sends body to url with a PUT request
+        and returns the result dictionary
+        """
+        try:
+            response = self.transport.put(url, data=body, headers=self.headers)
+        finally:
+            self._invalidate_listings(storage_path)
         try:
             response.raise_for_status()
         except HTTPError as http:
@@ -178,12 +1167,12 @@ class Storage:
         url = self.base_url + parse.quote(storage_path)
 
         try:
-            response = requests.delete(url, headers=self.headers)
-            response.raise_for_status
+            response = self.transport.delete(url, headers=self.headers)
+            response.raise_for_status()
         except HTTPError as http:
             return {
                 "status": "error",
-                "HTTP": response.raise_for_status(),
+                "HTTP": response.status_code,
                 "msg": f"HTTP Error occured: {http}",
             }
         except Exception as err:
@@ -198,6 +1187,8 @@ class Storage:
                 "HTTP": response.status_code,
                 "msg": "Object Successfully Deleted",
             }
+        finally:
+            self._invalidate_listings(storage_path)
 
     def _populate_metadata(self, source_dict, target_dict, field_mappings=None):
         """
@@ -218,22 +1209,7 @@ class Storage:
         dict : The populated target dictionary
         """
         if field_mappings is None:
-            field_mappings = {
-                "Guid": "guid",
-                "StorageZoneName": "storage_zone_name",
-                "Path": "path",
-                "Length": "length",
-                "LastChanged": "last_changed",
-                "ServerId": "server_id",
-                "ArrayNumber": "array_number",
-                "IsDirectory": "is_directory",
-                "UserId": "user_id",
-                "ContentType": "content_type",
-                "DateCreated": "date_created",
-                "StorageZoneId": "storage_zone_id",
-                "Checksum": "checksum",
-                "ReplicatedZones": "replicated_zones",
-            }
+            field_mappings = METADATA_FIELDS
 
         for source_key, target_key in field_mappings.items():
             if source_key in source_dict:
@@ -241,26 +1217,36 @@ class Storage:
 
         return target_dict
 
-    def GetStoragedObjectsList(self, storage_path=None, include_metadata=False):
+    def GetStoragedObjectsList(self, storage_path=None, include_metadata=False, primary=False):
         """
         This functions returns a list of files and directories located in given storage_path.
+        With regions the listing comes from the fastest region and may not show the
+        latest writes yet, which always go to the primary region
         Parameters
         ----------
         storage_path : The directory path that you want to list.
         include_metadata : bool, optional
                           If True, includes additional metadata fields in the response
+        primary : bool, optional
+                  If True the listing comes from the primary region and shows every
+                  completed write. The listing cache is not read
         """
+        # callers get copies of the cached entries, so they can change them
+        cache_key = ((storage_path or "").strip("/"), include_metadata)
+        if self.listing_cache is not None and not primary:
+            storage_list = self.listing_cache.get(cache_key)
+            if storage_list is not None:
+                return [dict(entry) for entry in storage_list]
+
         # to build correct url
-        if storage_path is not None:
-            if storage_path[0] == "/":
-                storage_path = storage_path[1:]
-            if storage_path[-1] != "/":
-                url = self.base_url + parse.quote(storage_path) + "/"
+        if storage_path is not None and storage_path.strip("/") != "":
+            url = self._Geturl(storage_path) + "/"
         else:
             url = self.base_url
+        generation = self._listing_generation
         # Sending GET request
         try:
-            response = requests.get(url, headers=self.headers)
+            response = self._read(url, primary, headers=self.headers)
             response.raise_for_status()
         except HTTPError as http:
             return {
@@ -269,17 +1255,92 @@ class Storage:
                 "msg": f"http error occured {http}",
             }
         else:
-            storage_list = []
-            for dictionary in response.json():
-                temp_dict = {}
-                for key in dictionary:
-                    if key == "ObjectName" and dictionary["IsDirectory"] is False:
-                        temp_dict["File_Name"] = dictionary[key]
-                    if key == "ObjectName" and dictionary["IsDirectory"]:
-                        temp_dict["Folder_Name"] = dictionary[key]
-
-                if include_metadata:
-                    temp_dict = self._populate_metadata(dictionary, temp_dict)
-
-                storage_list.append(temp_dict)
+            storage_list = self._parse_listing(response.json(), include_metadata)
+            # a listing fetched while a change was made may already be stale
+            if self.listing_cache is not None and generation == self._listing_generation:
+                self.listing_cache.set(cache_key, storage_list)
+                return [dict(entry) for entry in storage_list]
             return storage_list
+
+    def IterStoragedObjects(self, storage_path=None, chunk_size=64 * 1024):
+        """
+        This function lists the files and directories located in given storage_path
+        without decoding the whole response at once. On success it returns a generator
+        of compact StorageObject entries, which are parsed incrementally while the
+        response streams in and decode their fields only when they are read.
+        Suited to folders with hundreds of thousands of objects
+        Parameters
+        ----------
+        storage_path : The directory path that you want to list.
+        chunk_size   : int, optional
+                       The size in bytes of the response chunks parsed at a time
+
+        Examples
+        --------
+        entries = obj_storage.IterStoragedObjects("videos")
+        names = [entry.object_name for entry in entries if not entry.is_directory]
+        """
+        # to build correct url
+        if storage_path is not None and storage_path.strip("/") != "":
+            url = self._Geturl(storage_path) + "/"
+        else:
+            url = self.base_url
+        # Sending GET request
+        try:
+            response = self._read(url, headers=self.headers, stream=True)
+            response.raise_for_status()
+        except HTTPError as http:
+            return {
+                "status": "error",
+                "HTTP": response.status_code,
+                "msg": f"http error occured {http}",
+            }
+        else:
+            return self._iter_objects(response, chunk_size)
+
+    def _iter_objects(self, response, chunk_size):
+        with response:
+            for raw in iter_json_array(response.iter_content(chunk_size)):
+                yield StorageObject(raw)
+
+    def _invalidate_listings(self, storage_path):
+        """
+        Helper function which drops the cached listings that a change of
+        storage_path can affect: every folder above it and, when a folder
+        is deleted, the folder itself and everything below it
+        """
+        self._listing_generation += 1
+        if self.listing_cache is None:
+            return
+        path = storage_path.strip("/")
+
+        def affected(cache_key):
+            folder = cache_key[0]
+            return (
+                folder == ""
+                or folder == path
+                or path.startswith(folder + "/")
+                or folder.startswith(path + "/")
+            )
+
+        self.listing_cache.invalidate(affected)
+
+    def _parse_listing(self, objects, include_metadata=False):
+        """
+        Helper function which converts the decoded JSON listing of a folder
+        into the list returned by GetStoragedObjectsList
+        """
+        storage_list = []
+        for dictionary in objects:
+            temp_dict = {}
+            for key in dictionary:
+                if key == "ObjectName" and dictionary["IsDirectory"] is False:
+                    temp_dict["File_Name"] = dictionary[key]
+                if key == "ObjectName" and dictionary["IsDirectory"]:
+                    temp_dict["Folder_Name"] = dictionary[key]
+
+            if include_metadata:
+                temp_dict = self._populate_metadata(dictionary, temp_dict)
+
+            storage_list.append(temp_dict)
+        return storage_list
@@ -0,0 +1,207 @@
+"""This code provides the bounded-memory request and response bodies used for transfers"""
+
+import hashlib
+import io
+import mmap
+import os
+
+# size of each chunk handed to the socket while uploading
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# size of the part of a local file that is memory mapped at once
+MAP_WINDOW_SIZE = 64 * 1024 * 1024
+
+# size of the reusable buffer responses are read into while downloading
+DOWNLOAD_BUFFER_SIZE = 1024 * 1024
+
+
+class UploadBody:
+    """
+    Iterable request body with a known length, so requests sends it with a
+    Content-Length header while reading only one chunk at a time.
+    If chunks is a callable it is called for every iteration, which makes the
+    body replayable so the request can be retried
+    """
+
+    def __init__(self, chunks, length):
+        self.chunks = chunks
+        self.length = length
+        self.replayable = callable(chunks)
+
+    def __iter__(self):
+        if self.replayable:
+            return iter(self.chunks())
+        return iter(self.chunks)
+
+    def __len__(self):
+        return self.length
+
+
+def iter_mapped_file(path, chunk_size=UPLOAD_CHUNK_SIZE, window_size=MAP_WINDOW_SIZE):
+    """
+    Yields zero-copy memoryview slices of a local file which is memory
+    mapped one window at a time, so resident memory stays bounded
+    Parameters
+    ----------
+    path        : String
+                  The path of the local file
+    chunk_size  : int
+                  The size in bytes of every yielded slice
+    window_size : int
+                  The size in bytes of each mapped window, rounded up
+                  to a multiple of mmap.ALLOCATIONGRANULARITY
+    """
+    granularity = mmap.ALLOCATIONGRANULARITY
+    window_size = -(-max(window_size, chunk_size) // granularity) * granularity
+    with open(path, "rb") as file:
+        size = os.fstat(file.fileno()).st_size
+        for start in range(0, size, window_size):
+            length = min(window_size, size - start)
+            with mmap.mmap(
+                file.fileno(), length, access=mmap.ACCESS_READ, offset=start
+            ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    for offset in range(0, length, chunk_size):
+                        chunk = view[offset:offset + chunk_size]
+                        try:
+                            yield chunk
+                        finally:
+                            # release each slice so the window can be unmapped
+                            chunk.release()
+                finally:
+                    view.release()
+
+
+def file_checksum(path, chunk_size=UPLOAD_CHUNK_SIZE):
+    """
+    Returns the upper case hex SHA-256 of a local file, the format of the
+    Checksum field of storage zone listings
+    """
+    digest = hashlib.sha256()
+    for chunk in iter_mapped_file(path, chunk_size):
+        digest.update(chunk)
+    return digest.hexdigest().upper()
+
+
+def iter_file_object(file_object, chunk_size=UPLOAD_CHUNK_SIZE):
+    """
+    Yields chunks of at most chunk_size bytes read from a file-like object
+    """
+    while True:
+        chunk = file_object.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def remaining_length(file_object):
+    """
+    Returns the number of bytes left to read in a file-like object,
+    or None when it cannot be determined without reading it
+    """
+    try:
+        return os.fstat(file_object.fileno()).st_size - file_object.tell()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        pass
+    try:
+        position = file_object.tell()
+        end = file_object.seek(0, os.SEEK_END)
+        file_object.seek(position)
+        return end - position
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return None
+
+
+def _rewinding(file_object, position, chunk_size):
+    def chunks():
+        file_object.seek(position)
+        return iter_file_object(file_object, chunk_size)
+
+    return chunks
+
+
+def file_body(path, chunk_size=UPLOAD_CHUNK_SIZE):
+    """
+    Builds a streaming request body for a local file
+    """
+    length = os.path.getsize(path)
+    if length == 0:
+        return b""
+    return UploadBody(lambda: iter_mapped_file(path, chunk_size), length)
+
+
+def hashed_file_body(path, chunk_size=UPLOAD_CHUNK_SIZE):
+    """
+    Builds the body of file_body together with a function returning the upper
+    case hex SHA-256 of the last complete pass over the file (None before),
+    so an upload yields the checksum of what was sent without a second read
+    """
+    if os.path.getsize(path) == 0:
+        return b"", lambda: hashlib.sha256().hexdigest().upper()
+    completed = []
+
+    def chunks():
+        digest = hashlib.sha256()
+        for chunk in iter_mapped_file(path, chunk_size):
+            digest.update(chunk)
+            yield chunk
+        completed.append(digest.hexdigest().upper())
+
+    return UploadBody(chunks, os.path.getsize(path)), lambda: completed[-1] if completed else None
+
+
+def stream_body(source, content_length=None, chunk_size=UPLOAD_CHUNK_SIZE):
+    """
+    Builds a streaming request body for a file-like object or byte iterator.
+    If the length is unknown the body is sent with chunked transfer encoding
+    """
+    if hasattr(source, "read"):
+        if content_length is None:
+            content_length = remaining_length(source)
+        chunks = iter_file_object(source, chunk_size)
+        try:
+            # seekable sources are read again from the same place on a retry
+            position = source.tell()
+            if source.seekable():
+                chunks = _rewinding(source, position, chunk_size)
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            pass
+    else:
+        chunks = source
+    if content_length is None:
+        return iter(chunks)
+    return UploadBody(chunks, content_length)
+
+
+def copy_to_file(raw, file_object, buffer_size=DOWNLOAD_BUFFER_SIZE):
+    """
+    Copies a raw response stream to a writable file object using
+    readinto calls on one reusable buffer and returns the bytes copied
+    """
+    view = memoryview(bytearray(buffer_size))
+    total = 0
+    while True:
+        count = raw.readinto(view)
+        if not count:
+            return total
+        file_object.write(view[:count])
+        total += count
+
+
+def copy_to_buffer(raw, buffer, buffer_size=DOWNLOAD_BUFFER_SIZE):
+    """
+    Reads a raw response stream straight into a caller-provided writable
+    buffer and returns the bytes copied. Raises BufferError if the
+    response does not fit in the buffer
+    """
+    view = memoryview(buffer).cast("B")
+    total = 0
+    while total < len(view):
+        count = raw.readinto(view[total:total + buffer_size])
+        if not count:
+            return total
+        total += count
+    if raw.read(1):
+        raise BufferError(f"response is larger than the {len(view)} byte buffer")
+    return total
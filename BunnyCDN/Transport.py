@@ -0,0 +1,177 @@
+"""This code provides the pooled HTTP transport shared by Storage and CDN"""
+
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests import exceptions
+
+from .Metrics import RequestEvent, current_operation
+from .Retry import RetryPolicy
+
+
+class Transport:
+
+    # initializer for the pooled transport
+
+    def __init__(
+        self, pool_connections=10, pool_maxsize=10, pool_block=False, retry=True, hooks=None
+    ):
+        """
+        Creates a keep-alive HTTP transport backed by a pooled requests.Session
+        Parameters
+        ----------
+        pool_connections(optional parameter) : int
+                                               Number of per-host connection
+                                               pools to keep cached
+        pool_maxsize(optional parameter)     : int
+                                               Maximum number of connections
+                                               kept alive in each host pool.
+                                               Set this to the number of
+                                               threads sharing the transport
+        pool_block(optional parameter)       : bool
+                                               If True, requests wait for a free
+                                               connection instead of opening
+                                               extra ones beyond pool_maxsize
+        retry(optional parameter)            : RetryPolicy or bool
+                                               The retry policy of every request.
+                                               True uses a RetryPolicy with its
+                                               defaults, False or None disables retries
+        hooks(optional parameter)            : list of Hook
+                                               Objects whose before_request and
+                                               after_request methods are called
+                                               around every request, for example
+                                               a MetricsCollector
+        """
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+        )
+        # the same adapter is used for both schemes so every host gets
+        # its own pool and connections are reused across calls
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        if retry is True:
+            retry = RetryPolicy()
+        self.retry = retry or None
+        self.hooks = list(hooks or [])
+
+    # the list is replaced rather than changed, so requests in flight
+    # keep calling the hooks they started with
+    def add_hook(self, hook):
+        self.hooks = self.hooks + [hook]
+
+    def remove_hook(self, hook):
+        self.hooks = [registered for registered in self.hooks if registered is not hook]
+
+    def request(self, method, url, retry=True, **kwargs):
+        """
+        Sends a HTTP request over a pooled connection and returns the response.
+        Connection errors and retryable responses are retried as the retry
+        policy allows, as long as the request body can be sent again.
+        The hooks get a RequestEvent before the request is sent and after
+        its response arrives or it raised
+        Parameters
+        ----------
+        method : String
+                 The HTTP method (GET, PUT, POST, DELETE)
+        url    : String
+                 The full url of the request
+        retry  : bool
+                 False sends the request once, for callers which fail over
+                 to another endpoint instead of retrying
+        kwargs :  Passed through to requests.Session.request
+        """
+        hooks = self.hooks
+        if not hooks:
+            return self._send(method, url, None, retry, kwargs)
+
+        event = RequestEvent(current_operation(), method, url)
+        for hook in hooks:
+            hook.before_request(event)
+        start = time.perf_counter()
+        try:
+            response = self._send(method, url, event, retry, kwargs)
+        except Exception as err:
+            event.error = err
+            raise
+        else:
+            event.status = response.status_code
+            event.bytes_sent = int(response.request.headers.get("Content-Length") or 0)
+            if kwargs.get("stream"):
+                # the body is read later by the caller
+                event.bytes_received = int(response.headers.get("Content-Length") or 0)
+            else:
+                event.bytes_received = len(response.content)
+            return response
+        finally:
+            event.seconds = time.perf_counter() - start
+            for hook in hooks:
+                hook.after_request(event)
+
+    def _send(self, method, url, event, retry, kwargs):
+        """
+        Sends the request, retrying it as the retry policy allows, and
+        counts the retries in event
+        """
+        policy = self.retry if retry else None
+        if policy is None or not policy.allows(method) or not _replayable(kwargs.get("data")):
+            return self.session.request(method, url, **kwargs)
+
+        attempt = 0
+        while True:
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (exceptions.ConnectionError, exceptions.Timeout):
+                delay = policy.backoff(attempt)
+                if delay is None:
+                    raise
+            else:
+                if response.status_code not in policy.statuses:
+                    policy.record_success()
+                    return response
+                delay = policy.backoff(attempt, response)
+                if delay is None:
+                    return response
+                response.close()
+            time.sleep(delay)
+            attempt += 1
+            if event is not None:
+                event.retries = attempt
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request("PUT", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request("DELETE", url, **kwargs)
+
+    def close(self):
+        """
+        Closes every pooled connection held by this transport
+        """
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def _replayable(data):
+    """
+    Tells if a request body can be sent again: no body, an in-memory body,
+    or a streaming body which rebuilds its chunks on every iteration
+    """
+    if data is None or isinstance(data, (bytes, bytearray, memoryview, str, dict, list, tuple)):
+        return True
+    return getattr(data, "replayable", False)
@@ -0,0 +1 @@
+"""Benchmarks for the BunnyCDN python library run against a local stand-in server"""
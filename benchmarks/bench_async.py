@@ -0,0 +1,78 @@
+"""
+Runs concurrent AsyncStorage uploads, listings, downloads and deletes against
+the local fake of the storage API, checks their results and reports the
+throughput of each step
+
+Run with: python -m benchmarks.bench_async [files] [size in KB]
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from BunnyCDN.AsyncStorage import AsyncStorage
+from .server import StandInServer, fake_bunny
+
+
+async def _timed(label, calls):
+    start = time.perf_counter()
+    results = await asyncio.gather(*calls)
+    seconds = time.perf_counter() - start
+    print(f"{label:24}: {len(results) / seconds:8.0f} requests/s")
+    return results
+
+
+async def _run(url, count, size, tmp):
+    upload_dir = os.path.join(tmp, "upload")
+    download_dir = os.path.join(tmp, "download")
+    os.makedirs(upload_dir)
+    os.makedirs(download_dir)
+    names = [f"file-{index}.bin" for index in range(count)]
+    for name in names:
+        with open(os.path.join(upload_dir, name), "wb") as file:
+            file.write(os.urandom(size))
+
+    async with AsyncStorage("x", "zone") as storage:
+        storage.base_url = url + "zone/"
+
+        results = await _timed(
+            "PutFile", (storage.PutFile(name, f"async/{name}", upload_dir) for name in names)
+        )
+        assert all(result["status"] == "success" for result in results), results
+
+        listings = await _timed(
+            "GetStoragedObjectsList",
+            (storage.GetStoragedObjectsList("async", include_metadata=True) for _ in range(count)),
+        )
+        for listing in listings:
+            assert sorted(entry["File_Name"] for entry in listing) == sorted(names), listing
+            assert all(entry["length"] == size for entry in listing), listing
+
+        results = await _timed(
+            "DownloadFile", (storage.DownloadFile(f"async/{name}", download_dir) for name in names)
+        )
+        assert all(result["status"] == "success" for result in results), results
+        for name in names:
+            # the fake keeps sizes only, the contents come back as zero bytes
+            assert os.path.getsize(os.path.join(download_dir, name)) == size, name
+
+        results = await _timed("DeleteFile", (storage.DeleteFile(f"async/{name}") for name in names))
+        assert all(result["status"] == "success" for result in results), results
+        assert await storage.GetStoragedObjectsList("async") == []
+
+        missing = await storage.DeleteFile("async/missing.bin")
+        assert missing["status"] == "error" and missing["HTTP"] == 404, missing
+
+
+def main(count=200, size_kb=64):
+    handler = fake_bunny()
+    with StandInServer(handler) as server, tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(_run(server.url, count, size_kb * 1024, tmp))
+        assert handler.state.objects == {}, handler.state.objects
+    print("all results checked")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
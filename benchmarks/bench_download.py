@@ -0,0 +1,70 @@
+"""
+Measures single-stream download throughput of Storage.DownloadFile and
+DownloadFileObject against the local stand-in server
+
+Run with: python -m benchmarks.bench_download [size in MB]
+"""
+
+import io
+import os
+import sys
+import tempfile
+import time
+
+from BunnyCDN.Storage import Storage
+from .server import StandInHandler, StandInServer
+
+BLOCK = b"\0" * (1 << 20)
+
+
+class FileHandler(StandInHandler):
+
+    # number of bytes served for every GET
+    size = 0
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", str(self.size))
+        self.end_headers()
+        remaining = self.size
+        while remaining > 0:
+            remaining -= self.wfile.write(BLOCK[:remaining])
+
+
+def _mb_per_second(call, size):
+    start = time.perf_counter()
+    result = call()
+    assert result["status"] == "success", result
+    return size / (1024 * 1024) / (time.perf_counter() - start)
+
+
+def main(size_mb=512):
+    FileHandler.size = size = int(size_mb * 1024 * 1024)
+    with StandInServer(FileHandler) as server, Storage("x", "zone") as storage:
+        storage.base_url = server.url + "zone/"
+        with tempfile.TemporaryDirectory() as tmp:
+            results = {
+                "DownloadFile (64 KB buffer)": _mb_per_second(
+                    lambda: storage.DownloadFile("file.bin", tmp, buffer_size=1 << 16), size
+                ),
+                "DownloadFile (1 MB buffer)": _mb_per_second(
+                    lambda: storage.DownloadFile("file.bin", tmp), size
+                ),
+                "DownloadFileObject (BytesIO)": _mb_per_second(
+                    lambda: storage.DownloadFileObject("file.bin", io.BytesIO()), size
+                ),
+            }
+            with open(os.path.join(tmp, "out.bin"), "wb") as file:
+                results["DownloadFileObject (open file)"] = _mb_per_second(
+                    lambda: storage.DownloadFileObject("file.bin", file), size
+                )
+        buffer = bytearray(size)
+        results["DownloadFileObject (bytearray)"] = _mb_per_second(
+            lambda: storage.DownloadFileObject("file.bin", buffer), size
+        )
+    for name, rate in results.items():
+        print(f"{name:32}: {rate:8.0f} MB/s")
+
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 512)
@@ -0,0 +1,84 @@
+"""
+Compares memory and time per 100k entries of GetStoragedObjectsList with
+include_metadata against the streamed, lazily decoded IterStoragedObjects
+
+Run with: python -m benchmarks.bench_listing [entries]
+"""
+
+import json
+import sys
+import time
+import tracemalloc
+
+from BunnyCDN.Storage import Storage
+from .server import StandInHandler, StandInServer
+
+
+def make_listing(entries):
+    return json.dumps(
+        [
+            {
+                "Guid": f"5d2c7bd4-0000-4c39-b1a4-{i:012d}",
+                "StorageZoneName": "zone",
+                "Path": "/zone/big/",
+                "ObjectName": f"object-{i}.jpg",
+                "Length": 1000 + i,
+                "LastChanged": "2026-01-01T00:00:00.000",
+                "ServerId": 10,
+                "ArrayNumber": 0,
+                "IsDirectory": False,
+                "UserId": "8f1a1d1e-0000-4b2a-a1e2-000000000000",
+                "ContentType": "",
+                "DateCreated": "2026-01-01T00:00:00.000",
+                "StorageZoneId": 1234,
+                "Checksum": f"{i:064X}",
+                "ReplicatedZones": "NY,SG",
+            }
+            for i in range(entries)
+        ]
+    ).encode()
+
+
+class ListingHandler(StandInHandler):
+
+    # JSON body served for every GET
+    body = b"[]"
+
+    def do_GET(self):
+        self._reply(200, self.body)
+
+
+def _measure(call):
+    tracemalloc.start()
+    result = call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    start = time.perf_counter()
+    call()
+    return result, peak, time.perf_counter() - start
+
+
+def main(entries=100_000):
+    ListingHandler.body = make_listing(entries)
+    scale = 100_000 / entries
+    with StandInServer(ListingHandler) as server, Storage("x", "zone") as storage:
+        storage.base_url = server.url + "zone/"
+        runs = {
+            "GetStoragedObjectsList(include_metadata=True)": lambda: storage.GetStoragedObjectsList(
+                "big", include_metadata=True
+            ),
+            "list(IterStoragedObjects)": lambda: list(storage.IterStoragedObjects("big")),
+            "IterStoragedObjects, names only": lambda: sum(
+                1 for entry in storage.IterStoragedObjects("big") if entry.object_name
+            ),
+        }
+        for name, call in runs.items():
+            _, peak, seconds = _measure(call)
+            print(
+                f"{name:46}: {peak * scale / 1024 ** 2:7.1f} MB peak, "
+                f"{seconds * scale:6.2f} s per 100k entries"
+            )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,50 @@
+"""
+Compares uploading in-memory thumbnails by writing each one to a temporary
+file for Storage.PutFile against sending the buffer with Storage.PutBytes
+
+Run with: python -m benchmarks.bench_put_bytes [thumbnails] [size in KB]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from BunnyCDN.Storage import Storage
+from .server import StandInServer
+
+
+def _files_per_second(call, count):
+    start = time.perf_counter()
+    for index in range(count):
+        result = call(index)
+        assert result["status"] == "success", result
+    return count / (time.perf_counter() - start)
+
+
+def main(count=2000, size_kb=32):
+    thumbnail = os.urandom(size_kb * 1024)
+    with StandInServer() as server, Storage("x", "zone") as storage:
+        storage.base_url = server.url + "zone/"
+        with tempfile.TemporaryDirectory() as tmp:
+
+            def through_disk(index):
+                name = f"thumb-{index}.jpg"
+                with open(os.path.join(tmp, name), "wb") as file:
+                    file.write(thumbnail)
+                try:
+                    return storage.PutFile(name, f"thumbs/{name}", tmp)
+                finally:
+                    os.remove(os.path.join(tmp, name))
+
+            disk = _files_per_second(through_disk, count)
+        memory = _files_per_second(
+            lambda index: storage.PutBytes(thumbnail, f"thumbs/thumb-{index}.jpg"), count
+        )
+    print(f"temporary file + PutFile : {disk:8.0f} files/s")
+    print(f"PutBytes                 : {memory:8.0f} files/s")
+    print(f"speedup                  : {memory / disk:8.2f}x")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,58 @@
+"""
+Compares reads from the primary region against latency-aware routing over
+stand-in regions with different injected delays, then makes the fastest
+region fail and shows the reads failing over to the next one
+
+Run with: python -m benchmarks.bench_regions [reads]
+"""
+
+import io
+import sys
+import time
+
+from BunnyCDN.Storage import Storage
+from .server import StandInServer, fake_bunny
+
+# injected delay of each stand-in region in seconds, the first is the primary
+DELAYS = {"primary": 0.040, "near": 0.005, "middle": 0.020}
+
+
+def _mean_ms(storage, reads):
+    start = time.perf_counter()
+    for _ in range(reads):
+        result = storage.DownloadFileObject("object.bin", io.BytesIO())
+        assert result["status"] == "success", result
+    return (time.perf_counter() - start) / reads * 1000
+
+
+def main(reads=50):
+    handlers = {name: fake_bunny(latency=delay) for name, delay in DELAYS.items()}
+    servers = {name: StandInServer(handler) for name, handler in handlers.items()}
+    for handler in handlers.values():
+        handler.state.objects["object.bin"] = 64 * 1024
+    for server in servers.values():
+        server.__enter__()
+    try:
+        urls = {name: server.url + "zone/" for name, server in servers.items()}
+        with Storage("x", "zone", storage_zone_region=urls["primary"]) as storage:
+            primary = _mean_ms(storage, reads)
+        with Storage(
+            "x",
+            "zone",
+            storage_zone_region=urls["primary"],
+            regions=[urls["near"], urls["middle"]],
+        ) as storage:
+            routed = _mean_ms(storage, reads)
+            handlers["near"].error_rate = 1.0
+            failover = _mean_ms(storage, reads)
+            demoted = storage.region_router.stats()[urls["near"]]["demoted"]
+    finally:
+        for server in servers.values():
+            server.__exit__(None, None, None)
+    print(f"primary region only       : {primary:6.1f} ms per read")
+    print(f"fastest region            : {routed:6.1f} ms per read")
+    print(f"fastest region failing    : {failover:6.1f} ms per read (demoted: {demoted})")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
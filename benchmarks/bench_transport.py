@@ -0,0 +1,39 @@
+"""
+Compares requests/sec of one-shot connections against the pooled Transport
+
+Run with: python -m benchmarks.bench_transport
+"""
+
+import time
+
+import requests
+
+from BunnyCDN.Storage import Storage
+from .server import StandInServer
+
+REQUESTS = 2000
+
+
+def _rate(call, url):
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        call(url)
+    return REQUESTS / (time.perf_counter() - start)
+
+
+def main():
+    with StandInServer() as server:
+        url = server.url + "zone/"
+        unpooled = _rate(lambda u: requests.get(u, headers={"AccessKey": "x"}), url)
+        with Storage("x", "zone") as storage:
+            storage.base_url = url
+            pooled = _rate(
+                lambda u: storage.transport.get(u, headers=storage.headers), url
+            )
+    print(f"module-level requests : {unpooled:8.0f} req/s")
+    print(f"pooled Transport      : {pooled:8.0f} req/s")
+    print(f"speedup               : {pooled / unpooled:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
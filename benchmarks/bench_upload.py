@@ -0,0 +1,44 @@
+"""
+Uploads a multi-GB sparse file through Storage.PutFile and reports the
+peak resident memory, which should stay flat whatever the file size
+
+Run with: python -m benchmarks.bench_upload [size in GB]
+"""
+
+import os
+import resource
+import sys
+import tempfile
+import time
+
+from BunnyCDN.Storage import Storage
+from .server import StandInServer
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def main(size_gb=4):
+    size = int(size_gb * 1024 ** 3)
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, "sparse.bin"), "wb") as file:
+            file.truncate(size)
+        with StandInServer() as server, Storage("x", "zone") as storage:
+            storage.base_url = server.url + "zone/"
+            before = _peak_rss_mb()
+            start = time.perf_counter()
+            result = storage.PutFile("sparse.bin", "sparse.bin", tmp)
+            elapsed = time.perf_counter() - start
+            after = _peak_rss_mb()
+    print(f"result        : {result['status']} (HTTP {result['HTTP']})")
+    print(f"uploaded      : {size / 1024 ** 2:.0f} MB in {elapsed:.1f} s "
+          f"({size / 1024 ** 2 / elapsed:.0f} MB/s)")
+    print(f"peak RSS      : {before:.0f} MB before, {after:.0f} MB after")
+    assert after - before < 256, "peak RSS grew with the upload size"
+
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 4)
@@ -0,0 +1,190 @@
+"""
+Runs the library benchmarks against a local fake of the storage API and
+api.bunny.net and writes the results as JSON, so runs can be compared
+across versions of the library
+
+Run with: python -m benchmarks.run [--latency MS] [--bandwidth MB/s]
+                                   [--error-rate SHARE] [--output FILE]
+"""
+
+import argparse
+import inspect
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+from BunnyCDN.CDN import CDN
+from BunnyCDN.Storage import Storage
+from .server import StandInServer, fake_bunny
+
+
+def _version():
+    try:
+        from importlib.metadata import version
+
+        return version("bunnycdnpython")
+    except Exception:
+        return None
+
+
+def _timed(call, operations, size=0):
+    """
+    Calls call(index) for every operation and summarises the latencies
+    """
+    latencies = []
+    errors = 0
+    start = time.perf_counter()
+    for index in range(operations):
+        begin = time.perf_counter()
+        result = call(index)
+        latencies.append(time.perf_counter() - begin)
+        if isinstance(result, dict) and result.get("status") == "error":
+            errors += 1
+    seconds = time.perf_counter() - start
+    latencies.sort()
+    summary = {
+        "operations": operations,
+        "errors": errors,
+        "seconds": seconds,
+        "ops_per_second": operations / seconds,
+        "latency_ms": {
+            "mean": statistics.mean(latencies) * 1000,
+            "p50": latencies[len(latencies) // 2] * 1000,
+            "p95": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000,
+            "max": latencies[-1] * 1000,
+        },
+    }
+    if size:
+        summary["mb_per_second"] = size * operations / 1024 ** 2 / seconds
+    return summary
+
+
+def bench_put_file(storage, state, args, tmp):
+    size = int(args.file_mb * 1024 ** 2)
+    with open(os.path.join(tmp, "upload.bin"), "wb") as file:
+        file.truncate(size)
+    return _timed(
+        lambda index: storage.PutFile("upload.bin", f"put/{index}.bin", tmp),
+        args.files,
+        size,
+    )
+
+
+def bench_put_bytes(storage, state, args, tmp):
+    size = int(args.file_mb * 1024 ** 2)
+    data = bytes(size)
+    return _timed(lambda index: storage.PutBytes(data, f"bytes/{index}.bin"), args.files, size)
+
+
+def bench_download_file(storage, state, args, tmp):
+    size = int(args.file_mb * 1024 ** 2)
+    state.objects["download.bin"] = size
+    return _timed(lambda index: storage.DownloadFile("download.bin", tmp), args.files, size)
+
+
+def bench_listing(storage, state, args, tmp):
+    for index in range(args.entries):
+        state.objects[f"big/object-{index}.jpg"] = 1000 + index
+    result = _timed(
+        lambda index: storage.GetStoragedObjectsList("big", include_metadata=True), args.listings
+    )
+    result["entries"] = args.entries
+    return result
+
+
+def bench_purge_url_cache(cdn, state, args, tmp):
+    return _timed(
+        lambda index: cdn.PurgeUrlCache(f"https://cdn.example.com/file-{index}.jpg"), args.requests
+    )
+
+
+def bench_update_pull_zone(cdn, state, args, tmp):
+    state.add_pullzones(1)
+    # every setting but the origin is left out of the update
+    settings = len(inspect.signature(cdn.UpdatePullZone).parameters) - 2
+    return _timed(
+        lambda index: cdn.UpdatePullZone(1, f"https://origin-{index}.example.com", *[None] * settings),
+        args.requests,
+    )
+
+
+STORAGE_BENCHMARKS = {
+    "PutFile": bench_put_file,
+    "PutBytes": bench_put_bytes,
+    "DownloadFile": bench_download_file,
+    "GetStoragedObjectsList": bench_listing,
+}
+
+CDN_BENCHMARKS = {
+    "PurgeUrlCache": bench_purge_url_cache,
+    "UpdatePullZone": bench_update_pull_zone,
+}
+
+
+def run(args):
+    results = {}
+    selected = set(args.only or list(STORAGE_BENCHMARKS) + list(CDN_BENCHMARKS))
+    for name, benchmark in {**STORAGE_BENCHMARKS, **CDN_BENCHMARKS}.items():
+        if name not in selected:
+            continue
+        # every benchmark gets a fresh server, so state and error draws repeat
+        handler = fake_bunny(
+            latency=args.latency / 1000,
+            bandwidth=args.bandwidth * 1024 ** 2 if args.bandwidth else None,
+            error_rate=args.error_rate,
+            seed=args.seed,
+        )
+        with StandInServer(handler) as server, tempfile.TemporaryDirectory() as tmp:
+            if name in STORAGE_BENCHMARKS:
+                client = Storage("x", "zone")
+                client.base_url = server.url + "zone/"
+            else:
+                client = CDN("x")
+                client.base_url = server.url + "api/"
+            with client:
+                result = benchmark(client, handler.state, args, tmp)
+                if client.transport.retry is not None:
+                    result["retries"] = client.transport.retry.stats()["retries"]
+            result["server_requests"] = handler.state.requests
+            result["injected_errors"] = handler.state.errors
+        results[name] = result
+    return {
+        "library_version": _version(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": vars(args),
+        "results": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.0, help="milliseconds added to every response")
+    parser.add_argument("--bandwidth", type=float, default=0.0, help="MB/s of request and response bodies, 0 for no limit")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with HTTP 503")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the injected errors")
+    parser.add_argument("--file-mb", type=float, default=64, help="size of the uploaded and downloaded file")
+    parser.add_argument("--files", type=int, default=5, help="uploads and downloads per benchmark")
+    parser.add_argument("--entries", type=int, default=100_000, help="entries of the listed folder")
+    parser.add_argument("--listings", type=int, default=3, help="listings per benchmark")
+    parser.add_argument("--requests", type=int, default=500, help="purges and pull zone updates per benchmark")
+    parser.add_argument(
+        "--only", nargs="+", choices=list(STORAGE_BENCHMARKS) + list(CDN_BENCHMARKS), help="benchmarks to run"
+    )
+    parser.add_argument("--output", help="file the JSON results are written to instead of stdout")
+    args = parser.parse_args(argv)
+    report = run(args)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
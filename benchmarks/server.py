@@ -0,0 +1,293 @@
+"""A local HTTP stand-in for the BunnyCDN endpoints used by the benchmarks"""
+
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+BLOCK = b"\0" * (1 << 16)
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+
+    # HTTP/1.1 so clients can keep connections alive between requests
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length", 0))
+        remaining = length
+        while remaining > 0:
+            chunk = self.rfile.read(min(remaining, 1 << 16))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+        return length
+
+    def _reply(self, status=200, body=b"{}"):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._reply()
+
+    def do_PUT(self):
+        self._read_body()
+        self._reply(201)
+
+    def do_POST(self):
+        self._read_body()
+        self._reply()
+
+    def do_DELETE(self):
+        self._reply()
+
+
+class FakeBunnyHandler(StandInHandler):
+    """
+    An in-memory fake of the storage API under /zone/ and of api.bunny.net
+    under /api/. Object contents are not kept, only their sizes, and
+    downloads are served as zero bytes. Use fake_bunny() to configure one
+    """
+
+    # seconds added before every response
+    latency = 0.0
+    # bytes per second of request and response bodies, None for no limit
+    bandwidth = None
+    # share of requests answered with error_status instead
+    error_rate = 0.0
+    error_status = 503
+    # created by fake_bunny()
+    state = None
+
+    def _delay(self, size):
+        if self.bandwidth and size:
+            time.sleep(size / self.bandwidth)
+
+    def _read_body(self):
+        length = super()._read_body()
+        self._delay(length)
+        return length
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        self._delay(length)
+        return json.loads(body or b"{}")
+
+    def _reply(self, status=200, body=b"{}"):
+        self._delay(len(body))
+        super()._reply(status, body)
+
+    def _route(self, method):
+        time.sleep(self.latency)
+        state = self.state
+        with state.lock:
+            state.requests += 1
+            failed = self.error_rate and state.random.random() < self.error_rate
+            if failed:
+                state.errors += 1
+        parts = urlsplit(self.path)
+        path = unquote(parts.path)
+        if failed:
+            if method in ("PUT", "POST"):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            return self._reply(self.error_status, b'{"Message": "injected error"}')
+        if path.startswith("/api/"):
+            return self._api(method, path[len("/api/"):], parse_qs(parts.query))
+        if path.startswith("/zone/"):
+            return self._storage(method, path[len("/zone/"):])
+        self._reply(404)
+
+    def _storage(self, method, path):
+        state = self.state
+        if method == "PUT":
+            size = self._read_body()
+            with state.lock:
+                state.objects[path] = size
+            return self._reply(201, b'{"HttpCode": 201, "Message": "File uploaded."}')
+        if method == "DELETE":
+            with state.lock:
+                found = state.objects.pop(path, None) is not None
+            return self._reply(200 if found else 404)
+        if path.endswith("/") or path == "":
+            return self._reply(200, state.listing(path))
+        size = state.objects.get(path)
+        if size is None:
+            return self._reply(404)
+        self.send_response(200)
+        self.send_header("Content-Length", str(size))
+        self.end_headers()
+        remaining = size
+        while remaining > 0:
+            chunk = BLOCK[:remaining]
+            self._delay(len(chunk))
+            remaining -= self.wfile.write(chunk)
+
+    def _api(self, method, path, query):
+        state = self.state
+        if path == "purge" and method == "POST":
+            with state.lock:
+                state.purges.extend(query.get("url", []))
+            return self._reply(200, b"")
+        if path == "pullzone" and method == "GET":
+            with state.lock:
+                body = json.dumps(list(state.pullzones.values())).encode()
+            return self._reply(200, body)
+        if path.startswith("pullzone/") and path.count("/") == 1:
+            try:
+                zone_id = int(path.split("/")[1])
+            except ValueError:
+                return self._reply(404)
+            with state.lock:
+                zone = state.pullzones.get(zone_id)
+            if zone is None:
+                if method == "POST":
+                    self._read_body()
+                return self._reply(404)
+            if method == "POST":
+                # a partial update, fields set to None are left out
+                changes = {key: value for key, value in self._read_json().items() if value is not None}
+                with state.lock:
+                    zone.update(changes)
+                return self._reply(204, b"")
+            with state.lock:
+                body = json.dumps(zone).encode()
+            return self._reply(200, body)
+        if method in ("PUT", "POST"):
+            self._read_body()
+        self._reply(200)
+
+    def do_GET(self):
+        self._route("GET")
+
+    def do_PUT(self):
+        self._route("PUT")
+
+    def do_POST(self):
+        self._route("POST")
+
+    def do_DELETE(self):
+        self._route("DELETE")
+
+
+class FakeBunnyState:
+    """
+    The objects, pull zones and counters of a fake_bunny() server
+    """
+
+    def __init__(self, seed=0):
+        self.lock = threading.Lock()
+        self.random = random.Random(seed)
+        # storage path -> size in bytes
+        self.objects = {}
+        self.pullzones = {}
+        self.purges = []
+        self.requests = 0
+        self.errors = 0
+
+    def add_pullzones(self, count):
+        for zone_id in range(1, count + 1):
+            self.pullzones[zone_id] = {
+                "Id": zone_id,
+                "Name": f"zone{zone_id}",
+                "OriginUrl": "https://origin.example.com",
+                "BlockedIps": [],
+                "EdgeRules": [],
+                "CacheControlMaxAgeOverride": -1,
+                "EnableLogging": True,
+            }
+
+    def listing(self, folder):
+        """
+        Returns the JSON listing of the objects directly inside folder
+        """
+        with self.lock:
+            names = [
+                (path[len(folder):], size)
+                for path, size in self.objects.items()
+                if path.startswith(folder) and "/" not in path[len(folder):]
+            ]
+        return json.dumps(
+            [
+                {
+                    "Guid": f"00000000-0000-4000-8000-{index:012d}",
+                    "StorageZoneName": "zone",
+                    "Path": f"/zone/{folder}",
+                    "ObjectName": name,
+                    "Length": size,
+                    "LastChanged": "2026-01-01T00:00:00.000",
+                    "ServerId": 1,
+                    "ArrayNumber": 0,
+                    "IsDirectory": False,
+                    "UserId": "00000000-0000-4000-8000-000000000000",
+                    "ContentType": "",
+                    "DateCreated": "2026-01-01T00:00:00.000",
+                    "StorageZoneId": 1,
+                    "Checksum": None,
+                    "ReplicatedZones": "",
+                }
+                for index, (name, size) in enumerate(names)
+            ]
+        ).encode()
+
+
+def fake_bunny(latency=0.0, bandwidth=None, error_rate=0.0, error_status=503, seed=0):
+    """
+    Returns a FakeBunnyHandler subclass with its own state and the given
+    latency in seconds, bandwidth in bytes per second and share of injected
+    errors. Errors are drawn from a generator seeded with seed, so runs are
+    reproducible
+    """
+    return type(
+        "FakeBunny",
+        (FakeBunnyHandler,),
+        {
+            "latency": latency,
+            "bandwidth": bandwidth,
+            "error_rate": error_rate,
+            "error_status": error_status,
+            "state": FakeBunnyState(seed),
+        },
+    )
+
+
+class _QuietServer(ThreadingHTTPServer):
+
+    # clients closing kept-alive connections are expected, not errors
+    def handle_error(self, request, client_address):
+        if not isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            super().handle_error(request, client_address)
+
+
+class StandInServer:
+    """
+    Runs a stand-in server on a free localhost port in a background thread
+    """
+
+    def __init__(self, handler=StandInHandler):
+        self.httpd = _QuietServer(("127.0.0.1", 0), handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.httpd.shutdown()
+        self.httpd.server_close()
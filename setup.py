@@ -15,12 +15,13 @@ setup(
     long_description=readall("README.md"),
     long_description_content_type="text/markdown",
     url="https://github.com/mathrithms/BunnyCDN-Python-Lib",
-    packages=find_packages(),
+    packages=find_packages(exclude=["benchmarks", "benchmarks.*"]),
     install_requires=["requests"],
+    extras_require={"async": ["aiohttp"], "numpy": ["numpy"]},
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",
         "Operating System :: OS Independent",
     ],
-    python_requires=">=3.6",
+    python_requires=">=3.7",
 )